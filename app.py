@@ -1,21 +1,31 @@
+import base64
+import threading
+
 import streamlit as st
-import os
-import time
-from data_handler import save_chat_history_json, load_chat_history, track_progress
+from data_handler import save_chat_history_json, track_progress
 from utils import (
-    speech_to_text,
-    analyze_audio,
     get_text_feedback,
     get_voice_feedback,
     text_to_speech,
-    get_hr_question,
+    get_tts_format,
+    next_hr_question,
     get_interview_feedback,
     get_storytelling_feedback,
-    generate_passage,
+    next_passage,
     get_summary_feedback,
-    extract_text_from_file,
+    stream_text_from_file,
     analyze_uploaded_audio,
+    DecodedAudio,
     get_presentation_feedback,
+    reset_call_counts,
+    get_call_counts,
+    get_llm_latencies,
+    get_llm_cache_stats,
+    get_llm_scheduler_stats,
+    SpeechPipeline,
+    ChatContext,
+    run_voice_turn,
+    warm_up,
 )
 
 
@@ -44,6 +54,177 @@ def lottie_spinner():
     )
 
 
+def synthesize_audio(text):
+    """
+    Synthesize `text` once and return the audio bytes for session storage.
+
+    Args:
+        text (str): The text to be converted into speech.
+
+    Returns:
+        bytes or None: Audio bytes, or None if synthesis failed.
+    """
+    audio_file = text_to_speech(text)
+    if not audio_file:
+        return None
+    with open(audio_file, "rb") as f:
+        return f.read()
+
+
+def render_user_message(text):
+    """Render the user's transcribed answer as a chat bubble."""
+    st.markdown(
+        f"""
+        <div class="chat-message user-message">
+            <div class="message-header">You</div>
+            <div class="message-content">{text}</div>
+        </div>
+        """,
+        unsafe_allow_html=True
+    )
+
+
+def render_feedback(feedback, heading=None, title="Feedback"):
+    """
+    Render LLM feedback as an assistant chat bubble.
+
+    Args:
+        feedback (str): The feedback text (possibly partial while streaming).
+        heading (str, optional): Heading shown above the bubble.
+        title (str): Bubble header.
+    """
+    if heading:
+        st.markdown(f"<h2>{heading}</h2>", unsafe_allow_html=True)
+    st.markdown(
+        f"""
+        <div class="chat-message assistant-message">
+            <div class="message-header">{title}</div>
+            <div class="message-content">{feedback}</div>
+        </div>
+        """,
+        unsafe_allow_html=True
+    )
+
+
+def stream_feedback(placeholder, render=render_feedback, **render_kwargs):
+    """
+    Build an `on_token` callback that re-renders the growing response.
+
+    Args:
+        placeholder: `st.empty()` slot to draw into.
+        render (callable): Renderer called as `render(text, **render_kwargs)`.
+
+    Returns:
+        callable: Callback taking each streamed text delta.
+    """
+    parts = []
+
+    def on_token(delta):
+        parts.append(delta)
+        with placeholder.container():
+            render("".join(parts), **render_kwargs)
+
+    return on_token
+
+
+def play_sentences(slot):
+    """
+    Build an `on_audio` callback that plays each spoken sentence as soon as it is ready.
+
+    Sentences are queued in the page and play one after another without a
+    click. Once the whole reply has been synthesized, `show_reply_audio`
+    replaces them with a single player for replaying it.
+
+    Args:
+        slot: `st.empty()` placeholder reserved for the reply's audio.
+
+    Returns:
+        callable: Callback taking the audio file path of each sentence.
+    """
+    container = slot.container()
+    mime = get_tts_format()
+
+    def on_audio(audio_path):
+        with open(audio_path, "rb") as f:
+            src = f"data:{mime};base64,{base64.b64encode(f.read()).decode('ascii')}"
+        # The queue and its audio elements are created in the page itself,
+        # not in the component's frame, so they keep playing after
+        # `show_reply_audio` removes the frames
+        with container:
+            st.components.v1.html(
+                f"""
+                <script>
+                    const page = window.parent;
+                    if (!page.talkieeSpeak) {{
+                        page.talkieeSpeak = new page.Function("src", `
+                            window.talkieeSpeech = (window.talkieeSpeech || Promise.resolve()).then(() => new Promise((done) => {{
+                                const audio = new Audio(src);
+                                audio.onended = audio.onerror = done;
+                                audio.play().catch(done);
+                            }}));
+                        `);
+                    }}
+                    page.talkieeSpeak("{src}");
+                </script>
+                """,
+                height=0,
+            )
+
+    return on_audio
+
+
+def show_reply_audio(slot, audio_path):
+    """
+    Swap the queued sentences in `slot` for one player to replay the whole reply.
+
+    Args:
+        slot: The placeholder passed to `play_sentences`.
+        audio_path (str or None): The joined reply audio, or None if a
+            sentence could not be synthesized (nothing is shown then).
+    """
+    if audio_path:
+        slot.audio(audio_path, format=get_tts_format())
+
+
+def render_turn_timings(timings):
+    """
+    Show how long each stage of a voice turn took.
+
+    Args:
+        timings (dict): Stage name to seconds, as returned by `run_voice_turn()`.
+    """
+    if timings:
+        st.caption(" · ".join(f"{stage} {seconds:.2f}s" for stage, seconds in timings.items()))
+
+
+def rerun():
+    """
+    Rerun the script, carrying this run's LLM/TTS call counts into the next
+    run's sidebar figure (st.rerun() ends the run before the sidebar is drawn).
+    """
+    st.session_state["carried_call_counts"] = get_call_counts()
+    st.rerun()
+
+
+def log_warm_up():
+    """Warm the shared resources and print how long each step took."""
+    timings = warm_up()
+    print("Warm-up: " + ", ".join(f"{step} {seconds:.2f}s" for step, seconds in timings.items()))
+
+
+@st.cache_resource(show_spinner=False)
+def start_warm_up():
+    """
+    Start warming shared models and clients once per server process.
+
+    Runs on a background thread so the first page renders immediately;
+    requests that arrive early wait only for the resource they need.
+    """
+    thread = threading.Thread(target=log_warm_up, name="talkiee-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
 def main():
     """Main function to run the Streamlit application."""
     st.set_page_config(
@@ -52,9 +233,12 @@ def main():
         layout="wide",
         initial_sidebar_state="collapsed"
     )
+    start_warm_up()
     
     if "chat_history" not in st.session_state:
         st.session_state["chat_history"] = []
+    if "chat_context" not in st.session_state:
+        st.session_state["chat_context"] = ChatContext()
 
     st.markdown(
         """
@@ -234,29 +418,48 @@ def main():
     
     if "current_tab" not in st.session_state:
         st.session_state["current_tab"] = "Home"
-    
-    tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(
-        ["Home", "Talkee.Ai", "Interview", "Narration", "Listening", "presentation"]
-    )
 
-    with tab1:
-        st.session_state["current_tab"] = "Home"
-        home_page_render()
-    with tab2:
-        st.session_state["current_tab"] = "Talkee.Ai"
-        render_main_section()
-    with tab3:
-        st.session_state["current_tab"] = "Interview"
-        render_interview_section()
-    with tab4:
-        st.session_state["current_tab"] = "Narration"
-        storytelling_with_feedback()
-    with tab5:
-        st.session_state["current_tab"] = "Listening"
-        render_listening_section()
-    with tab6:
-        st.session_state["current_tab"] = "Presentation"
-        render_presentation_section()
+    # Only the active page is executed, so hidden sections no longer fire
+    # LLM/TTS calls on every rerun the way st.tabs bodies did.
+    counter = reset_call_counts()
+    # Calls made by a run that ended in st.rerun() are added to this one's
+    carried = st.session_state.pop("carried_call_counts", {"llm": 0, "tts": 0})
+    call_counts = st.sidebar.empty()
+    page = st.radio(
+        "page",
+        list(PAGES),
+        key="current_tab",
+        horizontal=True,
+        label_visibility="collapsed",
+    )
+    PAGES[page]()
+
+    # Filled once the page is done, so calls made on worker threads are in;
+    # background prefetch and warm-up are not made for this run and not counted
+    counts = get_call_counts(counter)
+    call_counts.caption(
+        f"This rerun: {counts['llm'] + carried['llm']} LLM call(s), "
+        f"{counts['tts'] + carried['tts']} TTS call(s) (background prefetch not counted)"
+    )
+    latencies = get_llm_latencies()
+    if latencies:
+        last = latencies[-1]
+        st.sidebar.caption(
+            f"Last LLM call: first text {last['ttft']:.2f}s, complete {last['total']:.2f}s"
+        )
+    cache = get_llm_cache_stats()
+    if cache["hits"] + cache["misses"]:
+        st.sidebar.caption(
+            f"LLM cache: {cache['hit_rate']:.0%} hit rate, "
+            f"{cache['hits']} call(s) and {cache['saved_seconds']:.1f}s saved, "
+            f"{cache['coalesced']} shared in flight"
+        )
+    queue_stats = get_llm_scheduler_stats()
+    if queue_stats["admitted"]:
+        st.sidebar.caption(
+            f"LLM queue: {queue_stats['queued']} waiting, {queue_stats['in_flight']} in flight, "
+            f"avg wait {queue_stats['avg_wait_ms']:.0f} ms, {queue_stats['throttled']} rate-limited"
+        )
 
 
 def home_page_render():
@@ -339,14 +542,7 @@ def render_main_section():
 
     The function handles real-time feedback, audio synthesis, and chat history persistence.
     """
-    
-    if "current_tab" not in st.session_state:
-        st.session_state["current_tab"] = "Main"
 
-    if st.session_state["current_tab"] != "Main":
-        st.session_state["chat_history"] = []    
-        st.session_state["current_tab"] = "Main" 
-        
     st.markdown(
         """
         <h1 class="main-title">TALKIEE.AI</h1>
@@ -354,8 +550,7 @@ def render_main_section():
         unsafe_allow_html=True
     )
 
-    chat_history = load_chat_history()
-    progress = track_progress(chat_history)
+    progress = track_progress()
 
     review_score = progress["average_review_score"]
     imporvement_rate = progress["improvement_score"]
@@ -418,29 +613,49 @@ def render_main_section():
     col1, col2 = st.columns([6, 1])
     with col1:
         if st.button("Record"):
+            live_feedback = st.empty()
+            sentence_audio = st.empty()
             with st.empty():
                 lottie_spinner()
-                spoken_text, audio_file = speech_to_text()
+                turn = run_voice_turn(
+                    get_voice_feedback,
+                    st.session_state["chat_history"],
+                    on_transcript=st.write,
+                    on_token=stream_feedback(live_feedback, title="Assistant"),
+                    on_audio=play_sentences(sentence_audio),
+                )
 
-                if spoken_text and audio_file:
-                    pitch, pace = analyze_audio(audio_file)
-                    st.write(spoken_text)
-                    feedback = get_voice_feedback(spoken_text, pitch, pace,st.session_state["chat_history"])
-                    audio_file = text_to_speech(feedback)
-                    st.audio(audio_file, format="audio/mp3")
-                    os.remove(audio_file)
-                    save_chat_history_json(user_input, spoken_text, feedback, pitch, pace,)
+                # Spoken sentence by sentence through on_audio; keep the whole reply for replay
+                show_reply_audio(sentence_audio, turn["feedback_audio"])
+                if not turn["error"]:
+                    save_chat_history_json(user_input, turn["spoken_text"], turn["feedback"], turn["pitch"], turn["pace"])
                 else:
                     st.write("")
+            # The finished reply is shown in the chat history below
+            live_feedback.empty()
+            render_turn_timings(turn["timings"])
 
     with col2:
         if st.button("Send"):
             if user_input:
-                feedback = get_text_feedback(user_input, st.session_state["chat_history"])
-                audio_file = text_to_speech(feedback)
-                st.audio(audio_file, format="audio/mp3")
-                if audio_file and os.path.exists(audio_file):
-                    os.remove(audio_file)
+                live_feedback = st.empty()
+                show = stream_feedback(live_feedback, title="Assistant")
+                sentence_audio = st.empty()
+                speech = SpeechPipeline(on_audio=play_sentences(sentence_audio))
+
+                def on_token(delta):
+                    show(delta)
+                    speech.feed(delta)
+
+                feedback = get_text_feedback(
+                    user_input,
+                    st.session_state["chat_history"],
+                    on_token=on_token,
+                    context=st.session_state["chat_context"],
+                )
+                live_feedback.empty()
+                # Spoken sentence by sentence through on_audio; keep the whole reply for replay
+                show_reply_audio(sentence_audio, speech.close())
                 save_chat_history_json(user_input, "", feedback, pitch=0, pace=0)
             else:
                 st.write("")
@@ -478,7 +693,7 @@ def render_interview_section():
     - **Session State Initialization:**
         - Ensures the `chat_history` and `current_question` states are initialized.
     - **HR Question Display:**
-        - Displays a randomly generated HR interview question from the `get_hr_question()` function.
+        - Displays an HR interview question from the prefetched pool (`next_hr_question()`).
         - Uses text-to-speech (TTS) to play the question audio.
     - **User Interaction:**
         - **Record Answer:** Allows the user to record their answer via speech.
@@ -492,19 +707,12 @@ def render_interview_section():
 
     The function handles voice synthesis, audio analysis, and chat history persistence.
     """
-    if "current_tab" not in st.session_state:
-        st.session_state["current_tab"] = "Interview"
-        
-    if st.session_state["current_tab"] != "Interview":
-        st.session_state["chat_history"] = []
-        st.session_state["current_question"] = get_hr_question()
-        st.session_state["current_tab"] = "Interview"
-        
-    if "chat_history" not in st.session_state:
-        st.session_state["chat_history"] = []
+    if "interview_history" not in st.session_state:
+        st.session_state["interview_history"] = []
 
     if "current_question" not in st.session_state:
-        st.session_state["current_question"] = get_hr_question()
+        st.session_state["current_question"] = next_hr_question()
+        st.session_state["question_audio"] = synthesize_audio(st.session_state["current_question"])
 
     st.markdown("<h1 class='main-title'>HR Interview Session</h1>", unsafe_allow_html=True)
 
@@ -519,49 +727,36 @@ def render_interview_section():
         unsafe_allow_html=True
     )
 
-    question_audio = text_to_speech(hr_question)
-    st.audio(question_audio, format="audio/mp3")
+    question_audio = st.session_state["question_audio"]
     if question_audio:
-        os.remove(question_audio)
+        st.audio(question_audio, format=get_tts_format())
 
     col1, col2, col3 = st.columns([4, 4, 2])
     with col1:
         if st.button("Record Answer"):
+            live_feedback = st.empty()
+            sentence_audio = st.empty()
             with st.empty():
                 lottie_spinner()
-                spoken_text, audio_file = speech_to_text()
-
-                if spoken_text and audio_file:
-                    pitch, pace = analyze_audio(audio_file)
-                    st.markdown(
-                        f"""
-                        <div class="chat-message user-message">
-                            <div class="message-header">You</div>
-                            <div class="message-content">{spoken_text}</div>
-                        </div>
-                        """,
-                        unsafe_allow_html=True
-                    )
-                    feedback = get_interview_feedback(spoken_text, pitch, pace, st.session_state["chat_history"])
-                    st.markdown("<h2>✅ Feedback Result:</h2>", unsafe_allow_html=True)
-                    st.markdown(
-                        f"""
-                        <div class="chat-message assistant-message">
-                            <div class="message-header">Feedback</div>
-                            <div class="message-content">{feedback}</div>
-                        </div>
-                        """,
-                        unsafe_allow_html=True
-                    )
-                    feedback_audio = text_to_speech(feedback)
-                    st.audio(feedback_audio, format="audio/mp3")
-                    os.remove(feedback_audio)
-                else:
+                turn = run_voice_turn(
+                    get_interview_feedback,
+                    st.session_state["interview_history"],
+                    on_transcript=render_user_message,
+                    on_token=stream_feedback(live_feedback, heading="✅ Feedback Result:"),
+                    on_audio=play_sentences(sentence_audio),
+                )
+
+                # Spoken sentence by sentence through on_audio; keep the whole reply for replay
+                show_reply_audio(sentence_audio, turn["feedback_audio"])
+                if turn["error"]:
                     st.write("recoginzation failed")
+            render_turn_timings(turn["timings"])
 
     with col3:
         if st.button("Next"):
-            st.session_state["current_question"] = get_hr_question()
+            st.session_state["current_question"] = next_hr_question()
+            st.session_state["question_audio"] = synthesize_audio(st.session_state["current_question"])
+            rerun()
 
 
 def storytelling_with_feedback():
@@ -588,12 +783,9 @@ def storytelling_with_feedback():
     The function handles voice synthesis, audio analysis, and feedback presentation.
     """
 
-    if "current_tab" not in st.session_state:
-        st.session_state["current_tab"] = "Storytelling"
-    elif st.session_state["current_tab"] != "Storytelling":
-        st.session_state["story_feedback"] = ""
-        st.session_state["current_tab"] = "Storytelling"
-        
+    if "story_history" not in st.session_state:
+        st.session_state["story_history"] = []
+
     st.markdown(
         """
         <div class='main-title'>
@@ -626,38 +818,30 @@ def storytelling_with_feedback():
     col1, col2, col3 = st.columns([1, 4, 1])
     with col3:
         if st.button("Start Recording"):
+            with col2:
+                live_feedback = st.empty()
+                sentence_audio = st.empty()
             with st.empty():
                 lottie_spinner()
-                spoken_text, audio_file = speech_to_text()
 
-                if spoken_text and audio_file:
-                    pitch, pace = analyze_audio(audio_file)
+                def show_story(spoken_text):
                     with col2:
-                        st.markdown(
-                            f"""
-                            <div class="chat-message user-message">
-                                <div class="message-header">You</div>
-                                <div class="message-content">{spoken_text}</div>
-                            </div>
-                            """,
-                            unsafe_allow_html=True
-                        )
-                        feedback = get_storytelling_feedback(spoken_text, pitch, pace, st.session_state["chat_history"])
-                        st.markdown("<h2>✅ Feedback Result:</h2>", unsafe_allow_html=True)
-                        st.markdown(
-                            f"""
-                            <div class="chat-message assistant-message">
-                                <div class="message-header">Feedback</div>
-                                <div class="message-content">{feedback}</div>
-                            </div>
-                            """,
-                            unsafe_allow_html=True
-                        )
-                        feedback_audio = text_to_speech(feedback)
-                        st.audio(feedback_audio, format="audio/mp3")
-                        os.remove(feedback_audio)
-                else:
+                        render_user_message(spoken_text)
+
+                turn = run_voice_turn(
+                    get_storytelling_feedback,
+                    st.session_state["story_history"],
+                    on_transcript=show_story,
+                    on_token=stream_feedback(live_feedback, heading="✅ Feedback Result:"),
+                    on_audio=play_sentences(sentence_audio),
+                )
+
+                # Spoken sentence by sentence through on_audio; keep the whole reply for replay
+                show_reply_audio(sentence_audio, turn["feedback_audio"])
+                if turn["error"]:
                     st.write("")
+            with col2:
+                render_turn_timings(turn["timings"])
 
 
 def render_listening_section():
@@ -665,7 +849,7 @@ def render_listening_section():
     Render the Active Listening and Paraphrasing section with passage playback and feedback.
 
     - **Passage Generation and Playback:**
-        - Generates a random passage using `generate_passage()`.
+        - Takes a ready passage from the prefetched pool (`next_passage()`).
         - Converts the passage to speech using text-to-speech (TTS).
         - Plays the audio passage for the user to listen.
     - **User Interaction:**
@@ -682,19 +866,15 @@ def render_listening_section():
     The function handles text-to-speech synthesis, audio playback, feedback generation, 
     and user interaction.
     """
-    if "current_tab" not in st.session_state:
-        st.session_state["current_tab"] = "Listening"
-    elif st.session_state["current_tab"] != "Listening":
-        st.session_state["current_tab"] = "Listening"
-        
+    if "listening_passage" not in st.session_state:
+        st.session_state["listening_passage"] = next_passage()
+        st.session_state["listening_audio"] = synthesize_audio(st.session_state["listening_passage"])
+
     st.markdown("<h1 class='main-title'>Active Listening & Paraphrasing</h1>", unsafe_allow_html=True)
 
-    passage = generate_passage()
-    audio_file = text_to_speech(passage)
-    st.audio(audio_file, format="audio/mp3")
-    time.sleep(1)
-    if audio_file:
-        os.remove(audio_file)
+    passage = st.session_state["listening_passage"]
+    if st.session_state["listening_audio"]:
+        st.audio(st.session_state["listening_audio"], format=get_tts_format())
 
     st.markdown(
         """
@@ -708,26 +888,36 @@ def render_listening_section():
     user_summary = st.text_area("your summary", placeholder="Type your summary here...",label_visibility="hidden")
     col1, col2, col3 = st.columns([1, 4, 1])
 
+    with col1:
+        if st.button("New Passage"):
+            del st.session_state["listening_passage"]
+            rerun()
+
     with col3:
         if st.button("Get Feedback"):
             if user_summary.strip():
-                feedback = get_summary_feedback(passage, user_summary)
-                st.markdown("<h2>✅ Feedback:</h2>", unsafe_allow_html=True)
-                st.markdown(
-                    f"""
-                    <div class="feedback">
-                        <p>{feedback}</p>
-                    </div>
-                    """,
-                    unsafe_allow_html=True
+                feedback = get_summary_feedback(
+                    passage, user_summary, on_token=stream_feedback(st.empty(), render_summary_feedback)
                 )
                 feedback_audio = text_to_speech(feedback)
-                st.audio(feedback_audio, format="audio/mp3")
-                os.remove(feedback_audio)
+                st.audio(feedback_audio, format=get_tts_format())
             else:
                 st.write("Please enter a summary before requesting feedback.")
 
 
+def render_summary_feedback(feedback):
+    """Render feedback on the user's paraphrased summary."""
+    st.markdown("<h2>✅ Feedback:</h2>", unsafe_allow_html=True)
+    st.markdown(
+        f"""
+        <div class="feedback">
+            <p>{feedback}</p>
+        </div>
+        """,
+        unsafe_allow_html=True
+    )
+
+
 def render_presentation_section():
     """
     Render the Presentation Assessment section with file upload and feedback.
@@ -743,23 +933,18 @@ def render_presentation_section():
         - Generates detailed feedback on the presentation content.
         - Provides text-to-speech (TTS) audio feedback.
     - **Audio File Handling:**
-        - Saves the uploaded audio file temporarily.
+        - Decodes the uploaded audio once, shared by transcription and analysis.
         - Transcribes the audio into text.
         - Analyzes the audio for pitch and pace.
         - Generates detailed feedback on the voice presentation.
         - Provides TTS audio feedback.
     - **Temporary File Management:**
-        - Removes temporary audio and feedback files after processing.
+        - Releases the decoded audio buffer after processing.
     - **Error Handling:**
         - Displays messages for unsupported file formats or empty content.
 
     The function handles text and audio processing, TTS synthesis, and real-time feedback generation.
     """
-    if "current_tab" not in st.session_state:
-        st.session_state["current_tab"] = "Presentation"
-    elif st.session_state["current_tab"] != "Presentation":
-        st.session_state["current_tab"] = "Presentation"
-
     st.markdown("<h1 class='main-title'>Presentation Assessment</h1>", unsafe_allow_html=True)
     st.markdown(
         """
@@ -780,59 +965,54 @@ def render_presentation_section():
         file_extension = uploaded_file.name.split(".")[-1].lower()
 
         if file_extension in ["pdf", "docx"]:
-            presentation_text = extract_text_from_file(uploaded_file, file_extension)
-            if presentation_text:
-                # st.markdown("<h2>Uploaded Presentation Content:</h2>", unsafe_allow_html=True)
-                # st.write(presentation_text)
-                feedback = get_presentation_feedback(presentation_text, pitch=0, pace=0)
-                st.markdown("<h2>✅ Presentation Feedback:</h2>", unsafe_allow_html=True)
-                st.markdown(
-                    f"""
-                    <div class="chat-message assistant-message">
-                        <div class="message-header">Feedback</div>
-                        <div class="message-content">{feedback}</div>
-                    </div>
-                    """,
-                    unsafe_allow_html=True
+            try:
+                # Long decks are reviewed section by section while later pages are
+                # still being extracted; show progress until the report streams
+                progress = st.empty()
+                feedback = get_presentation_feedback(
+                    stream_text_from_file(uploaded_file, file_extension), pitch=0, pace=0,
+                    on_token=stream_feedback(st.empty(), heading="✅ Presentation Feedback:"),
+                    status_callback=progress.text,
                 )
+                progress.empty()
                 feedback_audio = text_to_speech(feedback)
-                st.audio(feedback_audio, format="audio/mp3")
-                os.remove(feedback_audio)
+                st.audio(feedback_audio, format=get_tts_format())
+            except Exception as e:
+                st.error(f"Error reading document: {e}")
 
         elif file_extension in [ "wav", "flac", "aiff"]:
-            audio_path = f"temp_audio.{file_extension}"
-            with open(audio_path, "wb") as f:
-                f.write(uploaded_file.getbuffer())
-
             try:
-                spoken_text, pitch, pace = analyze_uploaded_audio(audio_path)
+                # Decode the upload straight from memory, once, for both STT and analysis
+                progress = st.empty()
+                with DecodedAudio.from_file(uploaded_file, mmap=True) as audio:
+                    spoken_text, pitch, pace = analyze_uploaded_audio(audio, status_callback=progress.text)
+                progress.empty()
                 if spoken_text:
                     st.markdown("<h2>Transcribed Presentation:</h2>", unsafe_allow_html=True)
                     st.write(spoken_text)
-                    feedback = get_presentation_feedback(spoken_text, pitch, pace)
-                    st.markdown("<h2>✅ Presentation Feedback:</h2>", unsafe_allow_html=True)
-                    st.markdown(
-                        f"""
-                        <div class="chat-message assistant-message">
-                            <div class="message-header">Feedback</div>
-                            <div class="message-content">{feedback}</div>
-                        </div>
-                        """,
-                        unsafe_allow_html=True
+                    feedback = get_presentation_feedback(
+                        spoken_text, pitch, pace,
+                        on_token=stream_feedback(st.empty(), heading="✅ Presentation Feedback:"),
                     )
                     feedback_audio = text_to_speech(feedback)
-                    st.audio(feedback_audio, format="audio/mp3")
-                    if os.path.exists(feedback_audio):
-                        os.remove(feedback_audio)
-                if os.path.exists(audio_path):
-                    os.remove(audio_path)
-            except ValueError as e:
+                    st.audio(feedback_audio, format=get_tts_format())
+            except (ValueError, RuntimeError) as e:
                 st.error(f"Error processing audio: {e}")
-            os.remove(audio_path)
         else:
             st.error(
             f"Unsupported audio format: `{file_extension}`. Please upload mp3, WAV, FLAC, or AIFF audio files."
             )
 
+# Page router: maps each navigation label to the section that renders it.
+PAGES = {
+    "Home": home_page_render,
+    "Talkee.Ai": render_main_section,
+    "Interview": render_interview_section,
+    "Narration": storytelling_with_feedback,
+    "Listening": render_listening_section,
+    "Presentation": render_presentation_section,
+}
+
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,1151 @@
+# -------------------------
+# TALKIEE - Performance Benchmarks
+# -------------------------
+#
+# Usage: python benchmarks.py <name> [<name> ...]
+# Each benchmark runs against local/synthetic data only and prints its results.
+
+import concurrent.futures
+import os
+import sys
+import tempfile
+import threading
+import time
+
+
+def _timed(func, repeat=5):
+    """
+    Run `func` several times and return the best wall-clock time.
+
+    Args:
+    - func (callable): Zero-argument function to time.
+    - repeat (int): Number of runs.
+
+    Returns:
+    - tuple: (float, object)
+        - Best time in seconds.
+        - Result of the last run.
+    """
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+# -------------------------
+# Mock OpenAI-compatible server
+# -------------------------
+
+def _serve_mock_llm(ready, latency, reply, token_delay, prompt_token_delay, max_rps):
+    """Serve OpenAI-compatible chat completions until the process is terminated."""
+    import collections
+    import itertools
+    import json
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    counter = itertools.count(1)
+    recent = collections.deque()
+    recent_lock = threading.Lock()
+
+    def over_limit():
+        """Sliding one-second window, like a provider's requests-per-second limit."""
+        if max_rps is None:
+            return False
+        now = time.monotonic()
+        with recent_lock:
+            while recent and now - recent[0] > 1.0:
+                recent.popleft()
+            if len(recent) >= max_rps:
+                return True
+            recent.append(now)
+            return False
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if over_limit():
+                body = b'{"error": {"message": "Rate limit exceeded"}}'
+                self.send_response(429)
+                self.send_header("Retry-After", "1")
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+            # Prompt processing time grows with the prompt (about 4 characters per token)
+            prompt_chars = sum(len(m.get("content", "")) for m in request.get("messages", []))
+            time.sleep(latency + prompt_token_delay * prompt_chars / 4)
+            if request.get("stream"):
+                return self._stream(request)
+            # Generation time for the whole reply is paid before answering
+            time.sleep(token_delay * len(reply.split()))
+            content = reply.replace("{n}", str(next(counter)))
+            body = json.dumps({
+                "id": "mock",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", "mock"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+            }).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _stream(self, request):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            def send(data):
+                event = f"data: {data}\n\n".encode()
+                self.wfile.write(f"{len(event):x}\r\n".encode() + event + b"\r\n")
+                self.wfile.flush()
+
+            for i, word in enumerate(reply.split(" ")):
+                time.sleep(token_delay)
+                send(json.dumps({
+                    "id": "mock",
+                    "object": "chat.completion.chunk",
+                    "model": request.get("model", "mock"),
+                    "choices": [{
+                        "index": 0,
+                        "delta": {"content": word if i == 0 else " " + word},
+                        "finish_reason": None,
+                    }],
+                }))
+            send("[DONE]")
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    ready.put(server.server_port)
+    server.serve_forever()
+
+
+def start_mock_llm_server(latency=0.0, reply="Mock feedback.", token_delay=0.0, prompt_token_delay=0.0,
+                          max_rps=None):
+    """
+    Start a local OpenAI-compatible chat completions server in a child process.
+
+    Running it out of process keeps the server off the benchmark's GIL.
+
+    Args:
+    - latency (float): Seconds to wait before answering each request.
+    - reply (str): Completion text returned for every request; "{n}" is
+      replaced by a request counter in non-streamed replies.
+    - token_delay (float): Seconds spent generating each word of the reply.
+    - prompt_token_delay (float): Seconds spent reading each prompt token.
+    - max_rps (int, optional): Requests per second above which the server
+      answers 429 with "Retry-After: 1".
+
+    Returns:
+    - tuple: (callable, str)
+        - Function that stops the server.
+        - Base URL to use as XAI_BASE_URL.
+    """
+    import multiprocessing
+
+    ready = multiprocessing.Queue()
+    process = multiprocessing.Process(
+        target=_serve_mock_llm, args=(ready, latency, reply, token_delay, prompt_token_delay, max_rps), daemon=True
+    )
+    process.start()
+    port = ready.get(timeout=30)
+    return process.terminate, f"http://127.0.0.1:{port}/v1"
+
+
+def use_mock_llm(**server_kwargs):
+    """
+    Start a mock server and point the shared LLM client at it.
+
+    The shared scheduler is replaced by an unlimited one so benchmarks
+    measure the client, not the production rate limit.
+
+    Returns:
+    - tuple: (callable, str) as returned by `start_mock_llm_server`.
+    """
+    stop_server, base_url = start_mock_llm_server(**server_kwargs)
+    os.environ["XAI_API_KEY"] = "mock"
+    os.environ["XAI_BASE_URL"] = base_url
+    import utils
+
+    utils.run_async(utils.configure_llm())
+    utils.set_resource("llm_scheduler", utils.LLMScheduler(max_in_flight=1000, rate=1e9, burst=10 ** 9))
+    return stop_server, base_url
+
+
+# -------------------------
+# Progress aggregates
+# -------------------------
+
+def bench_progress(sizes=(1_000, 10_000, 100_000)):
+    """Compare O(1) sidebar metrics with the full-history scan at growing sizes."""
+    workdir = tempfile.mkdtemp(prefix="talkiee_bench_")
+    os.chdir(workdir)
+    import data_handler
+
+    inserted = 0
+    print(f"{'entries':>10} {'aggregates (ms)':>16} {'full scan (ms)':>15}")
+    for size in sizes:
+        batch = [
+            {
+                "timestamp": "2025-01-01 00:00:00",
+                "user_input": "hello",
+                "spoken_text": "",
+                "feedback": "good",
+                "pitch": 100.0 + i % 7,
+                "pace": 2.0,
+                "review_score": 1 + i % 10,
+            }
+            for i in range(inserted, size)
+        ]
+        data_handler.append_entries(batch)
+        inserted = size
+
+        fast, fast_result = _timed(data_handler.track_progress)
+        slow, slow_result = _timed(
+            lambda: data_handler.track_progress(data_handler.load_chat_history()), repeat=1
+        )
+        assert fast_result == slow_result
+        print(f"{size:>10} {fast * 1000:>16.3f} {slow * 1000:>15.1f}")
+
+
+# -------------------------
+# Pitch and pace analysis
+# -------------------------
+
+def _synthetic_speech(minutes, sr=16000):
+    """Alternate 1.2 s voiced tones with 0.8 s of silence."""
+    import numpy as np
+
+    t = np.arange(int(minutes * 60 * sr)) / sr
+    voiced = (t % 2.0) < 1.2
+    y = np.where(voiced, 0.5 * np.sin(2 * np.pi * (140 + 20 * (t // 2.0 % 5)) * t), 0.0)
+    return y.astype(np.float32), sr
+
+
+def _chunked_analyze_audio(y, sr, chunk_size=10):
+    """The previous per-chunk piptrack/get_duration/split loop, kept for comparison."""
+    import librosa
+    import numpy as np
+
+    total_duration = librosa.get_duration(y=y, sr=sr)
+    pitches = []
+    paces = []
+    for start in range(0, int(total_duration), chunk_size):
+        end = min(start + chunk_size, total_duration)
+        chunk_y = y[int(start * sr):int(end * sr)]
+        chunk_pitches, _ = librosa.piptrack(y=chunk_y, sr=sr)
+        pitch_values = chunk_pitches[chunk_pitches > 0]
+        pitches.append(np.mean(pitch_values) if len(pitch_values) > 0 else 0)
+        duration = librosa.get_duration(y=chunk_y, sr=sr)
+        words = len(librosa.effects.split(chunk_y))
+        paces.append(words / duration if duration > 0 else 0)
+    return float(np.mean(pitches) if pitches else 0), float(np.mean(paces) if paces else 0)
+
+
+def bench_audio_analysis(minutes=(1, 10, 60)):
+    """Compare the single-pass engine with the chunked loop on synthetic recordings."""
+    from utils import analyze_pitch_pace
+
+    # Warm up numba-compiled librosa kernels so they are not timed
+    y, sr = _synthetic_speech(0.2)
+    _chunked_analyze_audio(y, sr)
+    analyze_pitch_pace(y, sr)
+
+    print(f"{'minutes':>8} {'chunked (s)':>12} {'single-pass (s)':>16} {'speedup':>8}")
+    for length in minutes:
+        y, sr = _synthetic_speech(length)
+        old, _ = _timed(lambda: _chunked_analyze_audio(y, sr), repeat=1)
+        new, _ = _timed(lambda: analyze_pitch_pace(y, sr), repeat=1)
+        print(f"{length:>8} {old:>12.2f} {new:>16.2f} {old / new:>7.1f}x")
+
+
+def _write_synthetic_wav(path, minutes, sr=48000, block_seconds=60):
+    """Write a synthetic recording to `path` block by block."""
+    import soundfile as sf
+
+    with sf.SoundFile(path, "w", samplerate=sr, channels=1, subtype="PCM_16") as out:
+        remaining = int(minutes * 60)
+        while remaining > 0:
+            seconds = min(block_seconds, remaining)
+            y, _ = _synthetic_speech(seconds / 60, sr=sr)
+            out.write(y)
+            remaining -= seconds
+
+
+def _peak_rss_mb(code):
+    """Run `code` in a fresh interpreter and return its peak RSS in MB."""
+    import subprocess
+
+    script = (
+        "import resource, utils\n"
+        f"{code}\n"
+        "print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)"
+    )
+    output = subprocess.check_output(
+        [sys.executable, "-c", script], cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    return int(output.split()[-1]) / 1024
+
+
+def bench_streaming_memory(minutes=(10, 60)):
+    """Peak RSS of whole-file vs streaming analysis on 48 kHz recordings."""
+    import io
+
+    import soundfile as sf
+    from utils import DecodedAudio
+
+    # An upload that fails mid-decode must not leave its memory-mapped file behind
+    y, sr = _synthetic_speech(1 / 3)
+    upload = io.BytesIO()
+    sf.write(upload, y, sr, format="FLAC")
+    data = bytearray(upload.getvalue())
+    data[len(data) // 2:len(data) // 2 + 400] = bytes(range(200)) * 2
+    scratch = tempfile.mkdtemp(prefix="talkiee_bench_")
+    tempfile.tempdir, default_tempdir = scratch, tempfile.tempdir
+    try:
+        DecodedAudio.from_file(io.BytesIO(bytes(data)), mmap=True, block_seconds=1)
+        raise AssertionError("corrupt FLAC decoded without an error")
+    except sf.LibsndfileError as e:
+        assert os.listdir(scratch) == [], os.listdir(scratch)
+        print(f"corrupt upload: {e}; no temporary file left")
+    finally:
+        tempfile.tempdir = default_tempdir
+
+    baseline = _peak_rss_mb("pass")
+    print(f"imports only: {baseline:.0f} MB")
+    print(f"{'minutes':>8} {'whole-file (MB)':>16} {'streaming (MB)':>15}")
+    for length in minutes:
+        path = os.path.join(tempfile.mkdtemp(prefix="talkiee_bench_"), "speech.wav")
+        _write_synthetic_wav(path, length)
+        whole = _peak_rss_mb(f"utils.analyze_audio({path!r})")
+        streamed = _peak_rss_mb(f"utils.analyze_audio({path!r}, stream=True)")
+        print(f"{length:>8} {whole:>16.0f} {streamed:>15.0f}")
+        os.remove(path)
+
+
+# -------------------------
+# Transcription
+# -------------------------
+
+def _fake_recognizer(latency):
+    """Local stand-in for a network STT backend with fixed per-request latency."""
+    def recognize(audio_data):
+        time.sleep(latency)
+        return f"{len(audio_data.frame_data)} bytes"
+    return recognize
+
+
+def bench_parallel_transcription(minutes=30, latency=0.5, workers=(1, 4, 8)):
+    """Transcribe a synthetic upload with a fake recognizer at several pool sizes."""
+    from utils import DecodedAudio, analyze_uploaded_audio
+
+    y, sr = _synthetic_speech(minutes)
+    audio = DecodedAudio(y, sr)
+    print(f"{minutes} min upload, {latency * 1000:.0f} ms per chunk request")
+    print(f"{'workers':>8} {'total (s)':>10}")
+    for max_workers in workers:
+        elapsed, _ = _timed(
+            lambda: analyze_uploaded_audio(
+                audio, recognize=_fake_recognizer(latency), max_workers=max_workers
+            ),
+            repeat=1,
+        )
+        print(f"{max_workers:>8} {elapsed:>10.1f}")
+
+
+def bench_stt_backends(seconds=30, repeat=3):
+    """Model load time and CPU real-time factor (processing time / audio time) per STT backend."""
+    import speech_recognition as sr
+    import utils
+
+    y, sr_rate = _synthetic_speech(seconds / 60)
+    audio_data = utils.DecodedAudio(y, sr_rate).to_audio_data(0, seconds)
+    print(f"{seconds} s clip, best of {repeat}")
+    print(f"{'backend':>8} {'load (s)':>9} {'RTF':>7}")
+    for name, backend_class in utils.STT_BACKENDS.items():
+        backend = backend_class()
+        if not backend.available():
+            print(f"{name:>8} not available on this machine")
+            continue
+        load_time, _ = _timed(backend.load, repeat=1)
+
+        def run():
+            try:
+                return backend.transcribe(audio_data)
+            except sr.UnknownValueError:
+                return ""
+
+        try:
+            elapsed, _ = _timed(run, repeat=repeat)
+        except sr.RequestError as e:
+            print(f"{name:>8} failed: {e}")
+            continue
+        print(f"{name:>8} {load_time:>9.2f} {elapsed / seconds:>7.3f}")
+
+
+# -------------------------
+# Cold start
+# -------------------------
+
+_COLD_START_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import utils
+timings = {"import": time.perf_counter() - start}
+if sys.argv[1] == "warm":
+    start = time.perf_counter()
+    utils.warm_up()
+    timings["warm_up"] = time.perf_counter() - start
+import numpy as np
+y = np.random.default_rng(1).standard_normal(5 * 16000).astype(np.float32) * 0.1
+start = time.perf_counter()
+utils.analyze_pitch_pace(y, 16000)
+timings["first_analysis"] = time.perf_counter() - start
+start = time.perf_counter()
+utils.ask_grok("Hello", use_cache=False)
+timings["first_llm"] = time.perf_counter() - start
+print(json.dumps(timings))
+"""
+
+
+def bench_cold_start(runs=3):
+    """Import time and first-request latency in a fresh process, with and without warm-up."""
+    import json
+    import subprocess
+
+    stop_server, base_url = start_mock_llm_server()
+    env = dict(os.environ, XAI_API_KEY="mock", XAI_BASE_URL=base_url)
+    cwd = os.path.dirname(os.path.abspath(__file__))
+
+    print(f"{'mode':>6} {'import (s)':>11} {'warm-up (s)':>12} {'1st analysis (s)':>17} {'1st LLM (s)':>12}")
+    for mode in ("cold", "warm"):
+        results = [
+            json.loads(subprocess.check_output(
+                [sys.executable, "-c", _COLD_START_SCRIPT, mode], cwd=cwd, env=env
+            ).splitlines()[-1])
+            for _ in range(runs)
+        ]
+        best = {key: min(r[key] for r in results) for key in results[0]}
+        warm_up = f"{best['warm_up']:.2f}" if "warm_up" in best else "-"
+        print(f"{mode:>6} {best['import']:>11.2f} {warm_up:>12} "
+              f"{best['first_analysis']:>17.2f} {best['first_llm']:>12.3f}")
+    stop_server()
+
+
+# -------------------------
+# LLM client overhead
+# -------------------------
+
+def bench_llm_overhead(calls=200):
+    """Per-call overhead of asyncio.run + blocking client vs the persistent loop."""
+    import asyncio
+
+    stop_server, base_url = use_mock_llm()
+    import utils
+
+    def run_persistent():
+        for _ in range(calls):
+            utils.ask_grok("Hello", use_cache=False)
+
+    utils.ask_grok("Hello", use_cache=False)
+    persistent, _ = _timed(run_persistent, repeat=3)
+    print(f"persistent loop:      {persistent / calls * 1000:.2f} ms/call")
+
+    # The previous client is only needed for the comparison, not by the app
+    try:
+        from openai import OpenAI
+    except ImportError:
+        print("asyncio.run per call: openai not installed, previous client not measured")
+        stop_server()
+        return
+
+    payload = {
+        "model": "grok-2-latest",
+        "messages": [{"role": "user", "content": "Hello"}],
+        "max_tokens": 512,
+        "temperature": 0.7,
+    }
+    client = OpenAI(api_key="mock", base_url=base_url)
+
+    async def previous_call():
+        return await asyncio.to_thread(client.chat.completions.create, **payload)
+
+    def run_previous():
+        for _ in range(calls):
+            asyncio.run(previous_call())
+
+    # Warm up (client construction, first connection)
+    asyncio.run(previous_call())
+    previous, _ = _timed(run_previous, repeat=3)
+    print(f"asyncio.run per call: {previous / calls * 1000:.2f} ms/call")
+    stop_server()
+
+
+def bench_llm_cache(documents=5, submissions=20, latency=0.5):
+    """Resubmitted presentation feedback with and without the LLM response cache."""
+    import random
+    stop_server, _ = use_mock_llm(latency=latency)
+    import utils
+
+    utils.LLM_CACHE_DIR = tempfile.mkdtemp(prefix="talkiee_bench_llm_")
+    rng = random.Random(0)
+    texts = [f"Slide {i}: our quarterly results and next steps." for i in range(documents)]
+    # Resubmissions of the same document, sometimes re-extracted with different spacing
+    workload = [rng.choice(texts).replace(" ", rng.choice([" ", "  "]), 1) for _ in range(submissions)]
+
+    def run(use_cache):
+        for text in workload:
+            utils.get_presentation_feedback(text, 120.0, 2.5, use_cache=use_cache)
+
+    uncached, _ = _timed(lambda: run(False), repeat=1)
+    cached, _ = _timed(lambda: run(True), repeat=1)
+    stats = utils.get_llm_cache_stats()
+    print(f"{submissions} submissions of {documents} documents, {latency * 1000:.0f} ms per LLM call")
+    print(f"no cache: {uncached:.2f} s, {submissions} API calls")
+    print(f"cache:    {cached:.2f} s, {stats['misses']} API calls, hit rate {stats['hit_rate']:.0%}, "
+          f"{stats['saved_seconds']:.1f} s of LLM latency saved")
+
+    # Fresh process view: memory tier empty, entries served from disk
+    utils._LLM_CACHE.clear()
+    disk, _ = _timed(lambda: utils.get_presentation_feedback(texts[0], 120.0, 2.5), repeat=1)
+    print(f"disk-tier hit after restart: {disk * 1000:.2f} ms")
+    stop_server()
+
+
+def bench_single_flight(clients=20, latency=0.5, tts_latency=0.3):
+    """Identical concurrent LLM and TTS requests with and without single-flight coalescing."""
+    stop_server, _ = use_mock_llm(latency=latency)
+    import utils
+
+    utils.LLM_CACHE_DIR = tempfile.mkdtemp(prefix="talkiee_bench_llm_")
+    utils.TTS_CACHE_DIR = tempfile.mkdtemp(prefix="talkiee_bench_tts_")
+    engine = _register_stand_in_tts(latency=tts_latency)
+    upstream = {"llm": 0, "tts": 0}
+    lock = threading.Lock()
+
+    # Count the requests that actually leave the process
+    call_grok = utils.call_grok
+
+    def counted_call_grok(*args, **kwargs):
+        with lock:
+            upstream["llm"] += 1
+        return call_grok(*args, **kwargs)
+
+    backend = utils.get_tts_backend(engine)
+    synthesize = backend.synthesize
+
+    def counted_synthesize(*args, **kwargs):
+        with lock:
+            upstream["tts"] += 1
+        return synthesize(*args, **kwargs)
+
+    utils.call_grok = counted_call_grok
+    backend.synthesize = counted_synthesize
+
+    def burst(func):
+        upstream["llm"] = upstream["tts"] = 0
+        with concurrent.futures.ThreadPoolExecutor(clients) as pool:
+            start = time.perf_counter()
+            list(pool.map(lambda i: func(), range(clients)))
+        return time.perf_counter() - start, dict(upstream)
+
+    class NoFlights:
+        """Stand-in for `SingleFlight` that runs every call."""
+
+        stats = {"executed": 0, "coalesced": 0}
+
+        def do(self, key, func):
+            return func(), False
+
+    text = "Slide 1: our quarterly results and next steps."
+    subject = utils.PASSAGE_SUBJECTS[0]
+    flights = utils._LLM_FLIGHTS
+    print(f"{clients} concurrent identical requests, {latency * 1000:.0f} ms LLM, "
+          f"{tts_latency * 1000:.0f} ms TTS")
+    print(f"{'request':>22} {'coalescing':>11} {'time (s)':>9} {'upstream calls':>15}")
+    for name, run in (
+        ("feedback (no cache)", lambda: utils.get_presentation_feedback(text, 120.0, 2.5, use_cache=False)),
+        ("generate_passage", lambda: utils.generate_passage(subject)),
+    ):
+        for mode, single_flight in (("off", NoFlights()), ("on", flights)):
+            utils._LLM_FLIGHTS = single_flight
+            elapsed, calls = burst(run)
+            print(f"{name:>22} {mode:>11} {elapsed:>9.2f} {calls['llm']:>15}")
+    utils._LLM_FLIGHTS = flights
+    elapsed, calls = burst(lambda: utils.get_presentation_feedback(text, 120.0, 2.5))
+    print(f"LLM cached + coalesced: {elapsed:.2f} s, {calls['llm']} upstream calls, "
+          f"{utils.get_llm_cache_stats()['coalesced']} coalesced in total")
+    elapsed, calls = burst(lambda: utils.text_to_speech(text, engine=engine))
+    print(f"TTS coalesced:   {elapsed:.2f} s, {calls['tts']} upstream calls, "
+          f"{utils.get_tts_cache_stats()['coalesced']} coalesced")
+
+    utils.call_grok = call_grok
+    stop_server()
+
+
+def bench_prefetch(takes=10, latency=0.8):
+    """Latency of "Next question" with direct generation vs the prefetched pool."""
+    import statistics
+
+    stop_server, _ = use_mock_llm(latency=latency, reply="Question {n}: tell me about a challenge you solved.")
+    import utils
+
+    engine = _register_stand_in_tts()
+    utils.TTS_ENGINE = engine
+    utils.TTS_CACHE_DIR = tempfile.mkdtemp(prefix="talkiee_bench_tts_")
+    pool = utils.get_question_pool()
+
+    def direct():
+        utils.text_to_speech(utils.get_hr_question())
+
+    def pooled():
+        utils.text_to_speech(utils.next_hr_question())
+
+    start = time.perf_counter()
+    pool.refill()
+    while sum(pool.size().values()) < pool.target * len(pool.topics):
+        time.sleep(0.05)
+    print(f"initial fill of {len(pool.topics)} topics x {pool.target}: {time.perf_counter() - start:.1f} s "
+          f"in the background")
+
+    print(f"{'mode':>8} {'median (ms)':>12} {'max (ms)':>9}")
+    for name, run in (("direct", direct), ("pooled", pooled)):
+        samples = [_timed(run, repeat=1)[0] * 1000 for _ in range(takes)]
+        print(f"{name:>8} {statistics.median(samples):>12.1f} {max(samples):>9.1f}")
+    print(f"pool stats: {pool.stats}")
+    # Let the refills triggered above finish while the server is up
+    utils.get_prefetch_pool().shutdown(wait=True)
+    stop_server()
+
+
+def bench_chat_context(turns=200, report=(5, 50, 200), latency=0.05, prompt_token_delay=2e-5):
+    """Prompt tokens and latency per chat turn: full history vs the token-budgeted context."""
+    reply = "Feedback {n}: " + " ".join(["Your message was clear and well structured."] * 6)
+    stop_server, _ = use_mock_llm(latency=latency, reply=reply, prompt_token_delay=prompt_token_delay)
+    import utils
+
+    utils.LLM_CACHE_TTL = 0
+    print(f"mock LLM: {latency * 1000:.0f} ms + {prompt_token_delay * 1e6:.0f} us per prompt token")
+    print(f"{'context':>10} {'turn':>5} {'prompt tokens':>14} {'latency (ms)':>13}")
+    for name, context in (
+        ("full", utils.ChatContext(token_budget=10 ** 9, summarize=False)),
+        ("budgeted", utils.ChatContext()),
+    ):
+        history = []
+        for turn in range(1, turns + 1):
+            message = f"Turn {turn}: here is how I would introduce myself to a new team at work."
+            elapsed, _ = _timed(
+                lambda: utils.get_text_feedback(message, history, context=context), repeat=1
+            )
+            if turn in report:
+                print(f"{name:>10} {turn:>5} {context.prompt_tokens[-1]:>14} {elapsed * 1000:>13.1f}")
+    utils.get_prefetch_pool().shutdown(wait=True)
+    stop_server()
+
+
+def bench_llm_scheduler(interactive=10, background=30, latency=0.2, max_rps=10):
+    """Burst of requests against a rate-limited mock server, without and with the scheduler."""
+    import statistics
+
+    stop_server, _ = use_mock_llm(latency=latency, max_rps=max_rps)
+    import utils
+
+    def burst():
+        jobs = [utils.PRIORITY_BACKGROUND] * background + [utils.PRIORITY_INTERACTIVE] * interactive
+        latencies = {utils.PRIORITY_INTERACTIVE: [], utils.PRIORITY_BACKGROUND: []}
+        failed = 0
+
+        def run(priority):
+            start = time.perf_counter()
+            response = utils.ask_grok("Hello", use_cache=False, priority=priority)
+            return priority, time.perf_counter() - start, response.startswith("Failed")
+
+        start = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(len(jobs)) as pool:
+            for priority, elapsed, fail in pool.map(run, jobs):
+                latencies[priority].append(elapsed)
+                failed += fail
+        return time.perf_counter() - start, latencies, failed
+
+    print(f"{background} background + {interactive} interactive requests at once; "
+          f"server allows {max_rps} req/s, {latency * 1000:.0f} ms each")
+    print(f"{'scheduler':>10} {'total (s)':>10} {'429s':>5} {'failed':>7} "
+          f"{'interactive p50 (s)':>20} {'background p50 (s)':>19} {'max queued':>11}")
+    for name, scheduler in (
+        ("none", utils.LLMScheduler(max_in_flight=1000, rate=1e9, burst=10 ** 9)),
+        ("limited", utils.LLMScheduler(max_in_flight=8, rate=max_rps * 0.9, burst=1)),
+    ):
+        utils.set_resource("llm_scheduler", scheduler)
+        time.sleep(1.5)  # let the server's rate window drain
+        total, latencies, failed = burst()
+        stats = utils.get_llm_scheduler_stats()
+        print(f"{name:>10} {total:>10.2f} {stats['throttled']:>5} {failed:>7} "
+              f"{statistics.median(latencies[utils.PRIORITY_INTERACTIVE]):>20.2f} "
+              f"{statistics.median(latencies[utils.PRIORITY_BACKGROUND]):>19.2f} {stats['max_queued']:>11}")
+    stop_server()
+
+
+def bench_llm_streaming(words=120, latency=0.3, token_delay=0.02, calls=5):
+    """Time to first token and total time for blocking vs streamed completions."""
+    reply = " ".join(f"word{i}" for i in range(words))
+    stop_server, _ = use_mock_llm(latency=latency, reply=reply, token_delay=token_delay)
+    import utils
+
+    def blocking():
+        start = time.perf_counter()
+        text = utils.ask_grok("Hello", use_cache=False)
+        elapsed = time.perf_counter() - start
+        return elapsed, elapsed, text
+
+    def streamed():
+        first = []
+        start = time.perf_counter()
+        text = utils.ask_grok(
+            "Hello", on_token=lambda _: first or first.append(time.perf_counter()), use_cache=False
+        )
+        return first[0] - start, time.perf_counter() - start, text
+
+    blocking()
+    print(f"{words} words, {latency * 1000:.0f} ms to first token, {token_delay * 1000:.0f} ms/word")
+    print(f"{'mode':>10} {'first text (s)':>15} {'total (s)':>10}")
+    for name, run in (("blocking", blocking), ("streamed", streamed)):
+        results = [run() for _ in range(calls)]
+        assert all(text == reply for _, _, text in results)
+        first = min(r[0] for r in results)
+        total = min(r[1] for r in results)
+        print(f"{name:>10} {first:>15.2f} {total:>10.2f}")
+    stop_server()
+
+
+def _register_stand_in_tts(latency=0.3, per_char=0.002):
+    """
+    Register a local stand-in TTS backend as engine "stand-in".
+
+    It sleeps for a fixed request latency plus time per character, like a
+    remote engine, and writes a short silent WAV.
+    """
+    import numpy as np
+    import soundfile as sf
+    import utils
+
+    class StandInBackend(utils.TTSBackend):
+        name = "stand-in"
+
+        def synthesize(self, text, lang, path):
+            time.sleep(latency + per_char * len(text))
+            sf.write(path, np.zeros(1600, dtype=np.float32), 16000, format="WAV")
+
+    utils.TTS_BACKENDS["stand-in"] = StandInBackend
+    utils.set_resource("tts:stand-in", None)
+    return "stand-in"
+
+
+def bench_tts_pipeline(sentences=8, latency=0.3, token_delay=0.02, calls=3):
+    """Time to first audio: synthesize after the full reply vs sentence pipeline."""
+    reply = " ".join(
+        f"Sentence {i} gives one specific and constructive tip about your delivery."
+        for i in range(sentences)
+    )
+    stop_server, _ = use_mock_llm(latency=latency, reply=reply, token_delay=token_delay)
+    import utils
+
+    engine = _register_stand_in_tts()
+    print(f"{sentences} sentences, {len(reply.split())} words at {token_delay * 1000:.0f} ms/word; "
+          f"stand-in TTS 300 ms + 2 ms/char")
+    print(f"{'mode':>10} {'first audio (s)':>16} {'all audio (s)':>14}")
+
+    def sequential():
+        start = time.perf_counter()
+        utils.text_to_speech(utils.ask_grok("Hello", use_cache=False), engine=engine)
+        elapsed = time.perf_counter() - start
+        return elapsed, elapsed
+
+    def pipelined():
+        start = time.perf_counter()
+        first = []
+        speech = utils.SpeechPipeline(
+            on_audio=lambda _: first or first.append(time.perf_counter()), engine=engine
+        )
+        utils.ask_grok("Hello", on_token=speech, use_cache=False)
+        speech.close()
+        return first[0] - start, time.perf_counter() - start
+
+    for name, run in (("sequential", sequential), ("pipelined", pipelined)):
+        results = []
+        for _ in range(calls):
+            # Fresh cache each run so every sentence is synthesized
+            utils.TTS_CACHE_DIR = tempfile.mkdtemp(prefix="talkiee_bench_tts_")
+            results.append(run())
+        first = min(r[0] for r in results)
+        total = min(r[1] for r in results)
+        print(f"{name:>10} {first:>16.2f} {total:>14.2f}")
+    stop_server()
+
+
+def bench_tts_backends(requests=16, workers=(1, 4)):
+    """Single-request latency and pooled throughput of each available TTS backend."""
+    import utils
+
+    _register_stand_in_tts()
+    texts = [f"Request {i}: keep your answers short, specific and confident." for i in range(requests)]
+    print(f"{'backend':>10} {'workers':>8} {'latency (s)':>12} {'requests/s':>11}")
+    for name, backend_class in utils.TTS_BACKENDS.items():
+        if not backend_class().available():
+            print(f"{name:>10} not available on this machine")
+            continue
+        for max_workers in workers:
+            # Fresh cache and pool so every request is synthesized
+            utils.TTS_CACHE_DIR = tempfile.mkdtemp(prefix="talkiee_bench_tts_")
+            utils.TTS_MAX_WORKERS = max_workers
+            utils.set_resource("tts_pool", None)
+
+            latency, audio_path = _timed(lambda: utils.text_to_speech("Warm up.", engine=name), repeat=1)
+            if audio_path is None:
+                print(f"{name:>10} synthesis failed")
+                break
+            elapsed, paths = _timed(
+                lambda: [f.result() for f in [utils.text_to_speech_async(t, engine=name) for t in texts]],
+                repeat=1,
+            )
+            assert all(paths)
+            print(f"{name:>10} {max_workers:>8} {latency:>12.2f} {requests / elapsed:>11.1f}")
+
+
+def _synthetic_pdf(pages, lines=40):
+    """Build an uncompressed PDF with `pages` pages of Helvetica text."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in range(pages):
+        body = "".join(
+            f"({page + 1}.{line + 1} Our quarterly results improved and the next steps are clear.) Tj T* "
+            for line in range(lines)
+        )
+        stream = f"BT /F1 10 Tf 12 TL 40 800 Td {body}ET".encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects))
+        kids.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), pages)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, obj)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def bench_doc_cache(documents=4, pages=50, uploads=20):
+    """Parse time and hit rate for repeated uploads of a multi-page PDF corpus."""
+    import io
+    import random
+    import utils
+
+    utils.DOC_CACHE_DIR = tempfile.mkdtemp(prefix="talkiee_bench_doc_")
+    corpus = [_synthetic_pdf(pages + i) for i in range(documents)]
+    rng = random.Random(0)
+    # Each upload is a fresh file object, as Streamlit hands out on every rerun
+    workload = [rng.choice(corpus) for _ in range(uploads)]
+
+    def run(use_cache):
+        for data in workload:
+            utils.extract_text_from_file(io.BytesIO(data), "pdf", use_cache=use_cache)
+
+    uncached, _ = _timed(lambda: run(False), repeat=1)
+    cached, _ = _timed(lambda: run(True), repeat=1)
+    stats = utils.get_doc_cache_stats()
+    print(f"{uploads} uploads of {documents} PDFs with {pages}-{pages + documents - 1} pages")
+    print(f"no cache: {uncached:.2f} s ({uncached / uploads * 1000:.0f} ms per upload)")
+    print(f"cache:    {cached:.2f} s, {stats['misses']} parses, hit rate {stats['hit_rate']:.0%}, "
+          f"{stats['chars']} chars held in memory")
+
+    # Fresh process view: memory tier empty, text served from disk
+    with utils._DOC_CACHE_LOCK:
+        utils._DOC_CACHE.clear()
+        utils._DOC_CACHE_STATS["chars"] = 0
+    disk, _ = _timed(lambda: utils.extract_text_from_file(io.BytesIO(corpus[0]), "pdf"), repeat=1)
+    print(f"disk-tier hit after restart: {disk * 1000:.2f} ms")
+
+
+def _concatenating_extract_pdf(data):
+    """The previous page loop with repeated `text +=`, kept for comparison."""
+    import io
+    import PyPDF2
+
+    text = ""
+    for page in PyPDF2.PdfReader(io.BytesIO(data)).pages:
+        text += page.extract_text() or ""
+    return text
+
+
+def bench_doc_extraction(pages=(10, 100, 500), workers=2):
+    """Previous concatenating extractor vs sequential and process-pool page streaming."""
+    import utils
+
+    utils.DOC_MAX_WORKERS = workers
+    utils.DOC_PARALLEL_MIN_PAGES = 50
+    # Start the pool's processes outside the timed runs
+    utils.get_doc_pool().submit(sum, ()).result()
+    print(f"{len(os.sched_getaffinity(0))} usable CPU(s), pool of {workers} workers for PDFs of 50+ pages")
+
+    def first_page(data):
+        start = time.perf_counter()
+        pages_iter = utils.iter_document_pages(data, "pdf")
+        next(pages_iter)
+        elapsed = time.perf_counter() - start
+        pages_iter.close()
+        return elapsed
+
+    for count in pages:
+        data = _synthetic_pdf(count)
+        expected = _concatenating_extract_pdf(data)
+        assert utils._parse_document(data, "pdf") == expected
+        old, _ = _timed(lambda: _concatenating_extract_pdf(data), repeat=3)
+        new, _ = _timed(lambda: utils._parse_document(data, "pdf"), repeat=3)
+        utils.DOC_MAX_WORKERS = 1
+        sequential, _ = _timed(lambda: utils._parse_document(data, "pdf"), repeat=3)
+        first_sequential = first_page(data)
+        utils.DOC_MAX_WORKERS = workers
+        first_parallel = first_page(data)
+        print(f"{count:4d} pages: previous {old:.2f} s | streamed {sequential:.2f} s | "
+              f"auto {new:.2f} s | first page {first_sequential * 1000:.0f} ms "
+              f"sequential, {first_parallel * 1000:.0f} ms auto")
+    utils.get_doc_pool().shutdown()
+
+
+def bench_map_reduce_feedback(doc_tokens=(20_000, 50_000, 120_000), concurrency=(1, 4, 8), latency=0.3,
+                              prompt_token_delay=1e-4, token_delay=0.01, pdf_pages=200):
+    """Single-shot vs map-reduce presentation feedback on long synthetic documents."""
+    reply = " ".join(["The section is clear but the transitions need work."] * 15)
+    stop_server, _ = use_mock_llm(latency=latency, reply=reply, token_delay=token_delay,
+                                  prompt_token_delay=prompt_token_delay)
+    import utils
+
+    paragraph = " ".join(["Our quarterly results improved and the next steps are clear."] * 8)
+    print(f"mock LLM: {latency * 1000:.0f} ms + {prompt_token_delay * 1e6:.0f} us per prompt token "
+          f"+ {token_delay * 1000:.0f} ms per reply word, sections of "
+          f"{utils.PRESENTATION_SECTION_TOKENS} tokens")
+    for tokens in doc_tokens:
+        text = "\n\n".join([paragraph] * (tokens * 4 // (len(paragraph) + 2)))
+        sections = len(utils.split_into_sections(text))
+        single, _ = _timed(lambda: utils.get_presentation_feedback(
+            text, 120.0, 2.5, use_cache=False, section_tokens=10 ** 9), repeat=1)
+        results = [f"single-shot {single:.2f} s ({utils.count_tokens(text)}-token prompt)"]
+        for cap in concurrency:
+            elapsed, _ = _timed(lambda: utils.get_presentation_feedback(
+                text, 120.0, 2.5, use_cache=False, max_concurrency=cap), repeat=1)
+            results.append(f"map-reduce x{cap} {elapsed:.2f} s")
+        print(f"{utils.count_tokens(text):6d} tokens, {sections} sections: " + " | ".join(results))
+
+    # An uploaded deck: extract every page first, or review sections while extracting
+    data = _synthetic_pdf(pdf_pages)
+    whole, _ = _timed(lambda: utils.get_presentation_feedback(
+        utils.extract_text_from_file(data, "pdf", use_cache=False), 120.0, 2.5, use_cache=False), repeat=1)
+    streamed, _ = _timed(lambda: utils.get_presentation_feedback(
+        utils.stream_text_from_file(data, "pdf", use_cache=False), 120.0, 2.5, use_cache=False), repeat=1)
+    print(f"{pdf_pages}-page PDF: extract then review {whole:.2f} s | review while extracting {streamed:.2f} s")
+    stop_server()
+
+
+def _synthetic_recording(pauses, sr=16000, noise_db=-75, seed=0):
+    """
+    Speech-like bursts (4 Hz syllable envelope) over background noise.
+
+    Args:
+    - pauses (list): (speech seconds, following silence seconds) pairs.
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    parts = []
+    for speech, silence in pauses:
+        t = np.arange(int(speech * sr)) / sr
+        envelope = 0.5 + 0.5 * np.abs(np.sin(2 * np.pi * 2 * t))
+        parts.append(0.4 * envelope * np.sin(2 * np.pi * rng.uniform(110, 220) * t))
+        parts.append(np.zeros(int(silence * sr)))
+    y = np.concatenate(parts)
+    y += 10 ** (noise_db / 20) * rng.standard_normal(len(y))
+    return y.astype(np.float32), sr
+
+
+def _sample_recordings():
+    """(speech, pause) layouts of typical uploads and voice turns."""
+    import random
+
+    rng = random.Random(0)
+    return {
+        # Mic left running: silence before the answer and after it
+        "voice turn (60 s limit)": [(0, 2.5), (6, 0.4), (5, 0.3), (4, 41.8)],
+        # Interview answer with thinking pauses
+        "interview answer (3 min)": [(rng.uniform(2, 8), rng.uniform(0.3, 4)) for _ in range(30)],
+        # Presentation with slide changes and a long break
+        "presentation (10 min)": [(rng.uniform(5, 20), rng.choice([0.4, 1.0, 3.0])) for _ in range(45)]
+        + [(0, 60)],
+    }
+
+
+def bench_vad(rtf=0.1, request_latency=0.3, workers=4):
+    """Fraction of audio skipped and transcription time saved by the VAD on sample recordings."""
+    from utils import DecodedAudio, analyze_uploaded_audio, detect_speech_segments
+
+    recordings = _sample_recordings()
+
+    sent = []
+
+    def recognize(audio_data):
+        # Network/model cost grows with the audio sent: fixed latency plus a real-time factor
+        seconds = len(audio_data.frame_data) / (audio_data.sample_rate * audio_data.sample_width)
+        sent.append(seconds)
+        time.sleep(request_latency + rtf * seconds)
+        return "words"
+
+    def run(vad):
+        sent.clear()
+        elapsed, (_, _, pace) = _timed(lambda: analyze_uploaded_audio(
+            audio, recognize=recognize, max_workers=workers, vad=vad), repeat=1)
+        return elapsed, pace, sum(sent)
+
+    import numpy as np
+
+    # Takes without speech must not reach STT at all
+    rate = 16000
+    for name, y in (
+        ("digital silence", np.zeros(10 * rate, dtype=np.float32)),
+        ("quiet room", _synthetic_recording([(0, 10)], noise_db=-60)[0]),
+        ("steady noise", _synthetic_recording([(0, 10)], noise_db=-20)[0]),
+    ):
+        segments = detect_speech_segments(DecodedAudio(y, rate))
+        assert segments == [], (name, segments)
+        print(f"{name}: no speech segments")
+
+    # A quiet but real take (speech peaking at -55 dBFS over a -80 dBFS room) must still reach STT
+    y, _ = _synthetic_recording([(0, 1), (3, 1), (2, 1)], noise_db=-200)
+    y = y * 10 ** (-55 / 20) / np.sqrt(np.max(y ** 2) / 2)
+    y += 10 ** (-80 / 20) * np.random.default_rng(1).standard_normal(len(y)).astype(np.float32)
+    segments = detect_speech_segments(DecodedAudio(y, rate))
+    assert len(segments) == 2 and segments[0][0] < 1.2 and segments[-1][1] > 6.8, segments
+    print(f"quiet speech (-55 dBFS): {len(segments)} speech segments")
+
+    print(f"STT stand-in: {request_latency * 1000:.0f} ms per request + {rtf:.2f} x audio length, "
+          f"{workers} workers")
+    for name, pauses in recordings.items():
+        y, sr = _synthetic_recording(pauses)
+        audio = DecodedAudio(y, sr)
+        spoken = sum(speech for speech, _ in pauses)
+        segments = detect_speech_segments(audio)
+        kept = sum(end - start for start, end in segments)
+        off, pace_off, sent_off = run(False)
+        on, pace_on, sent_on = run(True)
+        print(f"{name}: {audio.duration:.0f} s, {spoken:.0f} s speech | skipped {1 - kept / audio.duration:.0%} "
+              f"({len(segments)} segments) | STT audio {sent_off:.0f} s -> {sent_on:.0f} s | "
+              f"end-to-end {off:.2f} s -> {on:.2f} s | pace {pace_off:.2f} -> {pace_on:.2f} /s")
+
+
+def bench_chunk_planner(chunk_duration=30, rtf=0.1, request_latency=0.3, workers=4):
+    """Fixed 30 s windows vs pause-aware chunks: words cut at chunk edges and transcription time."""
+    import numpy as np
+    import speech_recognition as sr
+    import utils
+
+    def cuts_in_speech(audio, chunks):
+        # A chunk edge inside a word: speech energy within 20 ms on both sides
+        edge = int(0.02 * audio.sample_rate)
+        count = 0
+        for chunk in chunks[1:]:
+            cut = chunk[0][0]
+            before, after = audio.samples[max(0, cut - edge):cut], audio.samples[cut:cut + edge]
+            if len(before) and len(after) and min(np.abs(before).max(), np.abs(after).max()) > 0.05:
+                count += 1
+        return count
+
+    def transcribe(audio, chunks):
+        # STT stand-in: a request that starts or ends mid-word comes back unclear
+        def recognize(audio_data):
+            seconds = len(audio_data.frame_data) / (audio_data.sample_rate * audio_data.sample_width)
+            time.sleep(request_latency + rtf * seconds)
+            samples = np.frombuffer(audio_data.frame_data, dtype="<i2")
+            edge = int(0.02 * audio_data.sample_rate)
+            if max(np.abs(samples[:edge]).max(), np.abs(samples[-edge:]).max()) > 0.05 * 32767:
+                raise sr.UnknownValueError()
+            return "words"
+
+        with concurrent.futures.ThreadPoolExecutor(workers) as pool:
+            start = time.perf_counter()
+            texts = list(pool.map(lambda c: utils._transcribe_chunk(recognize, audio, c, 1), chunks))
+        return time.perf_counter() - start, texts.count("[Unclear Audio]")
+
+    print(f"STT stand-in: {request_latency * 1000:.0f} ms per request + {rtf:.2f} x audio length, "
+          f"{workers} workers, chunks of at most {chunk_duration} s")
+    for name, pauses in _sample_recordings().items():
+        y, rate = _synthetic_recording(pauses)
+        audio = utils.DecodedAudio(y, rate)
+        step = chunk_duration * rate
+        plans = {
+            "fixed": [[(start, min(start + step, len(y)))] for start in range(0, len(y), step)],
+            "pause-aware": utils.plan_transcription_chunks(audio, chunk_duration),
+            "VAD + pause-aware": utils.plan_transcription_chunks(
+                audio, chunk_duration, utils.detect_speech_segments(audio)),
+        }
+        print(f"{name}:")
+        for plan, chunks in plans.items():
+            elapsed, unclear = transcribe(audio, chunks)
+            print(f"  {plan:>18}: {len(chunks):2d} chunks, {cuts_in_speech(audio, chunks):2d} cuts mid-word, "
+                  f"{unclear:2d} unclear, {elapsed:.2f} s")
+
+
+BENCHMARKS = {
+    "progress": bench_progress,
+    "audio_analysis": bench_audio_analysis,
+    "streaming_memory": bench_streaming_memory,
+    "parallel_transcription": bench_parallel_transcription,
+    "stt_backends": bench_stt_backends,
+    "vad": bench_vad,
+    "chunk_planner": bench_chunk_planner,
+    "cold_start": bench_cold_start,
+    "llm_overhead": bench_llm_overhead,
+    "llm_streaming": bench_llm_streaming,
+    "llm_scheduler": bench_llm_scheduler,
+    "chat_context": bench_chat_context,
+    "llm_cache": bench_llm_cache,
+    "single_flight": bench_single_flight,
+    "doc_cache": bench_doc_cache,
+    "doc_extraction": bench_doc_extraction,
+    "map_reduce_feedback": bench_map_reduce_feedback,
+    "prefetch": bench_prefetch,
+    "tts_pipeline": bench_tts_pipeline,
+    "tts_backends": bench_tts_backends,
+}
+
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        print(f"== {name} ==")
+        BENCHMARKS[name]()
@@ -1,19 +1,281 @@
+import contextlib
 import json
 import os
+import sqlite3
+import sys
+import threading
 import datetime
 import streamlit as st
 
-# JSON file path
+# SQLite history store (WAL mode) and the legacy JSON file it replaces
+HISTORY_DB = "data/chat_history.db"
 HISTORY_FILE = "data/chat_history.json"
 
+HISTORY_COLUMNS = (
+    "timestamp", "user_input", "spoken_text", "feedback", "pitch", "pace", "review_score"
+)
+
+# Scores kept for the improvement rate: the latest entry plus the five before it
+ROLLING_WINDOW = 6
+
 #  Ensure the data folder exists
-os.makedirs(os.path.dirname(HISTORY_FILE), exist_ok=True)
+os.makedirs(os.path.dirname(HISTORY_DB), exist_ok=True)
+
+# One connection per process, shared by every session and rerun: Streamlit
+# runs each rerun on a fresh thread, so a per-thread connection would be
+# reopened (and the schema re-run) on every rerun. _db_lock serializes its use.
+_conn = None
+_db_lock = threading.RLock()
+
+
+def get_connection():
+    """
+    Get the process-wide connection to the history database, creating the
+    schema and importing the legacy JSON history on first use.
+
+    The connection is shared across threads; use it through
+    `_locked_connection()`.
+
+    Returns:
+        sqlite3.Connection: Open connection in WAL mode.
+    """
+    global _conn
+    with _db_lock:
+        if _conn is not None:
+            return _conn
+
+        conn = sqlite3.connect(HISTORY_DB, timeout=30, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS chat_history (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp TEXT NOT NULL,
+                    user_input TEXT NOT NULL DEFAULT '',
+                    spoken_text TEXT NOT NULL DEFAULT '',
+                    feedback TEXT,
+                    pitch REAL,
+                    pace REAL,
+                    review_score INTEGER NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_chat_history_timestamp ON chat_history (timestamp)"
+            )
+            # Single-row running totals, updated in the same transaction as each insert
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS progress_aggregates (
+                    id INTEGER PRIMARY KEY CHECK (id = 0),
+                    session_count INTEGER NOT NULL,
+                    score_sum INTEGER NOT NULL,
+                    recent_scores TEXT NOT NULL,
+                    last_pitch REAL,
+                    last_pace REAL,
+                    prev_pitch REAL,
+                    prev_pace REAL
+                )
+                """
+            )
+        _conn = conn
+
+        if conn.execute("SELECT 1 FROM progress_aggregates").fetchone() is None:
+            rebuild_progress_aggregates()
+
+        if os.path.exists(HISTORY_FILE):
+            try:
+                migrate_json_history(HISTORY_FILE)
+            except (ValueError, OSError) as e:
+                print(f"Skipping legacy history import from {HISTORY_FILE}: {e}")
+        return conn
+
+
+@contextlib.contextmanager
+def _locked_connection():
+    """Hold the shared connection for the duration of the block."""
+    with _db_lock:
+        yield get_connection()
+
+
+def _empty_aggregates():
+    """Return running aggregates for an empty history."""
+    return {
+        "session_count": 0,
+        "score_sum": 0,
+        "recent_scores": [],
+        "last_pitch": None,
+        "last_pace": None,
+        "prev_pitch": None,
+        "prev_pace": None,
+    }
+
+
+def _apply_entries(aggregates, entries):
+    """
+    Fold chat entries, oldest first, into running aggregates in place.
+
+    Args:
+        aggregates (dict): Aggregates as returned by `_empty_aggregates()`.
+        entries (iterable): Chat entries (dicts or rows) to add.
+
+    Returns:
+        dict: The updated aggregates.
+    """
+    for entry in entries:
+        aggregates["session_count"] += 1
+        aggregates["score_sum"] += entry["review_score"]
+        aggregates["recent_scores"].append(entry["review_score"])
+        del aggregates["recent_scores"][:-ROLLING_WINDOW]
+        aggregates["prev_pitch"] = aggregates["last_pitch"]
+        aggregates["prev_pace"] = aggregates["last_pace"]
+        aggregates["last_pitch"] = entry["pitch"]
+        aggregates["last_pace"] = entry["pace"]
+    return aggregates
+
+
+def _read_aggregates(conn):
+    """Read the running aggregates row, or empty aggregates if it is missing."""
+    row = conn.execute("SELECT * FROM progress_aggregates WHERE id = 0").fetchone()
+    if row is None:
+        return _empty_aggregates()
+    aggregates = dict(row)
+    del aggregates["id"]
+    aggregates["recent_scores"] = json.loads(aggregates["recent_scores"])
+    return aggregates
+
+
+def _write_aggregates(conn, aggregates):
+    """Replace the running aggregates row. Caller owns the transaction."""
+    conn.execute(
+        """
+        INSERT OR REPLACE INTO progress_aggregates
+            (id, session_count, score_sum, recent_scores, last_pitch, last_pace, prev_pitch, prev_pace)
+        VALUES (0, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (
+            aggregates["session_count"],
+            aggregates["score_sum"],
+            json.dumps(aggregates["recent_scores"]),
+            aggregates["last_pitch"],
+            aggregates["last_pace"],
+            aggregates["prev_pitch"],
+            aggregates["prev_pace"],
+        ),
+    )
+
+
+def _insert_entries(conn, entries):
+    """
+    Insert chat entries (dicts) and update the running aggregates.
+
+    The caller must already hold a write transaction (BEGIN IMMEDIATE) so the
+    aggregates read-modify-write cannot interleave with another session.
+    """
+    conn.executemany(
+        f"INSERT INTO chat_history ({', '.join(HISTORY_COLUMNS)}) "
+        f"VALUES ({', '.join('?' for _ in HISTORY_COLUMNS)})",
+        [tuple(entry.get(col) for col in HISTORY_COLUMNS) for entry in entries],
+    )
+    _write_aggregates(conn, _apply_entries(_read_aggregates(conn), entries))
+
+
+def append_entries(entries):
+    """
+    Atomically append chat entries to the history store.
+
+    Args:
+        entries (list): Chat entry dicts with the keys in `HISTORY_COLUMNS`.
+    """
+    with _locked_connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            _insert_entries(conn, entries)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+
+def rebuild_progress_aggregates():
+    """
+    Recompute the running aggregates from the raw history and store them.
+
+    Rows are streamed from the database rather than loaded into memory.
+
+    Returns:
+        tuple: (dict, dict)
+            - Aggregates that were stored before the rebuild.
+            - Freshly recomputed aggregates.
+    """
+    with _locked_connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            previous = _read_aggregates(conn)
+            rows = conn.execute(
+                "SELECT review_score, pitch, pace FROM chat_history ORDER BY id"
+            )
+            rebuilt = _apply_entries(_empty_aggregates(), rows)
+            _write_aggregates(conn, rebuilt)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return previous, rebuilt
+
+
+def migrate_json_history(json_path=HISTORY_FILE):
+    """
+    Import a legacy JSON chat history file into the SQLite store.
+
+    The import only runs while the store is empty, so it is safe to call
+    repeatedly.
+
+    Args:
+        json_path (str): Path to the legacy JSON history file.
+
+    Returns:
+        int: Number of entries imported.
+    """
+    # Cheap check first: a populated store never reads the legacy file
+    with _locked_connection() as conn:
+        if conn.execute("SELECT 1 FROM chat_history LIMIT 1").fetchone():
+            return 0
+
+    with open(json_path, "r") as f:
+        chat_history = json.load(f)
+
+    entries = []
+    for entry in chat_history:
+        entry = dict(entry)
+        entry.setdefault("user_input", "")
+        entry.setdefault("spoken_text", "")
+        if "review_score" not in entry:
+            entry["review_score"] = convert_feedback_to_score(entry.get("feedback") or "")
+        entries.append(entry)
 
+    # Take the write lock before checking so concurrent processes import once
+    with _locked_connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("SELECT 1 FROM chat_history LIMIT 1").fetchone():
+                conn.rollback()
+                return 0
+            _insert_entries(conn, entries)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return len(entries)
 
-# Save Chat History to JSON
+
+# Save Chat History
 def save_chat_history_json(user_input, spoken_text, feedback, pitch, pace):
     """
-    Save chat history and metrics to a JSON file.
+    Append one chat entry and its metrics to the history store.
 
     Args:
         user_input (str): User's text input.
@@ -39,19 +301,8 @@ def save_chat_history_json(user_input, spoken_text, feedback, pitch, pace):
         "review_score": review_score
     }
 
-    # Load existing JSON data or create new list
-    if os.path.exists(HISTORY_FILE):
-        with open(HISTORY_FILE, "r") as f:
-            chat_history = json.load(f)
-    else:
-        chat_history = []
-
-    # Append the new entry
-    chat_history.append(chat_entry)
-
-    # Save back to the JSON file
-    with open(HISTORY_FILE, "w") as f:
-        json.dump(chat_history, f, indent=4)
+    # Single-row insert; SQLite serializes writers across sessions
+    append_entries([chat_entry])
 
     st.write("")
 
@@ -93,31 +344,52 @@ def convert_feedback_to_score(feedback):
     # Ensure the score is between 1 and 10
     return min(max(score, 1), 10)
 
-def load_chat_history():
+def load_chat_history(limit=None, since=None):
     """
-    Load chat history from the JSON file.
+    Load chat history entries in chronological order.
+
+    Args:
+        limit (int, optional): Only return the most recent `limit` entries.
+        since (str, optional): Only return entries with a timestamp at or after
+            this "%Y-%m-%d %H:%M:%S" value.
 
     Returns:
         list: List of chat history entries.
     """
-    if os.path.exists(HISTORY_FILE):
-        with open(HISTORY_FILE, "r") as f:
-            chat_history = json.load(f)
-        return chat_history
-    else:
-        return []  
+    query = f"SELECT {', '.join(HISTORY_COLUMNS)} FROM chat_history"
+    params = []
+    if since is not None:
+        query += " WHERE timestamp >= ?"
+        params.append(since)
+    query += " ORDER BY id DESC"
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(limit)
 
-def track_progress(chat_history):
+    with _locked_connection() as conn:
+        rows = conn.execute(query, params).fetchall()
+    return [dict(row) for row in reversed(rows)]
+
+def track_progress(chat_history=None):
     """
     Track average review score and last pitch & pace improvement.
+
+    When no history list is given, the values come from the running aggregates
+    maintained on every save, so the cost does not grow with the history.
     
     Args:
-        chat_history (list): List of chat entries.
+        chat_history (list, optional): List of chat entries.
     
     Returns:
         dict: Contains average review score, last pitch, and pace improvement.
     """
-    if not chat_history:
+    if chat_history is None:
+        with _locked_connection() as conn:
+            aggregates = _read_aggregates(conn)
+    else:
+        aggregates = _apply_entries(_empty_aggregates(), chat_history)
+
+    if not aggregates["session_count"]:
         return {
             "average_review_score": 0,
             "last_pitch_improvement": 0,
@@ -127,21 +399,17 @@ def track_progress(chat_history):
         }
 
     # Calculate average review score
-    total_sessions = len(chat_history)
-    total_score = sum(entry["review_score"] for entry in chat_history)
-    average_review_score = total_score / total_sessions
+    average_review_score = aggregates["score_sum"] / aggregates["session_count"]
 
     # Calculate last pitch and pace improvement
-    if len(chat_history) > 1:
-        latest_entry = chat_history[-1]
-        previous_entry = chat_history[-2]
-        
-        last_pitch_improvement = latest_entry["pitch"] - previous_entry["pitch"]
-        last_pace_improvement = latest_entry["pace"] - previous_entry["pace"]
-        average_last_5 = chat_history[-6:-1] if len(chat_history) >= 6 else chat_history[:-1]
+    recent_scores = aggregates["recent_scores"]
+    latest_score = recent_scores[-1]
+    if aggregates["session_count"] > 1:
+        last_pitch_improvement = (aggregates["last_pitch"] or 0) - (aggregates["prev_pitch"] or 0)
+        last_pace_improvement = (aggregates["last_pace"] or 0) - (aggregates["prev_pace"] or 0)
+        average_last_5 = recent_scores[:-1]
         
-        avg_score =  sum(entry["review_score"] for entry in average_last_5) / len(average_last_5)
-        latest_score = latest_entry["review_score"]
+        avg_score =  sum(average_last_5) / len(average_last_5)
         
         if avg_score != 0:
             improvement_rate = ((latest_score - avg_score) / avg_score) * 100
@@ -157,5 +425,23 @@ def track_progress(chat_history):
         "last_pitch_improvement": last_pitch_improvement,
         "last_pace_improvement": last_pace_improvement,
         "improvement_score":improvement_rate,
-        "latest_point":latest_entry["review_score"]
-    }
\ No newline at end of file
+        "latest_point":latest_score
+    }
+
+
+if __name__ == "__main__":
+    # Usage:
+    #   python data_handler.py migrate [path/to/chat_history.json]
+    #   python data_handler.py rebuild
+    command = sys.argv[1] if len(sys.argv) >= 2 else None
+    if command == "migrate":
+        json_path = sys.argv[2] if len(sys.argv) > 2 else HISTORY_FILE
+        print(f"Imported {migrate_json_history(json_path)} entries into {HISTORY_DB}")
+    elif command == "rebuild":
+        previous, rebuilt = rebuild_progress_aggregates()
+        status = "OK" if previous == rebuilt else "MISMATCH (stored aggregates replaced)"
+        print(f"Stored:  {previous}")
+        print(f"Rebuilt: {rebuilt}")
+        print(f"Verification: {status}")
+    else:
+        print("Usage: python data_handler.py migrate [json_path] | rebuild")
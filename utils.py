@@ -4,67 +4,270 @@
 
 import speech_recognition as sr
 import librosa
-import aiohttp
+import soundfile as sf
 import asyncio
-from openai import OpenAI
+import collections
+import concurrent.futures
+import contextlib
+import contextvars
+import email.utils
+import heapq
+import io
+import httpx
 import numpy as np
 from dotenv import load_dotenv
 import os
 import re
-from gtts import gTTS
 import functools
+import hashlib
+import importlib.util
+import itertools
+import json
+import multiprocessing
 import tempfile
-import PyPDF2
-import docx
 import time
+import queue
 import random
+import shutil
+import subprocess
+import threading
 
 # -------------------------
 # 1. CONFIGURATION
 # -------------------------
-_GLOBAL_LLM_CLIENT = None
 
 load_dotenv()
 
+
+class CallCounter:
+    """
+    LLM/TTS calls made on behalf of one script run, from any thread.
+
+    The counter of the current run travels in a context variable; work
+    handed to a worker pool through `_submit_counted` carries it along, so
+    calls made by TTS jobs and section reviews are counted too. Background
+    prefetch (content pool refills, history summaries) and the warm-up are
+    not done for any one run and are never counted.
+    """
+
+    def __init__(self):
+        self.llm = 0
+        self.tts = 0
+        self._lock = threading.Lock()
+
+    def add(self, kind):
+        """Increment the counter for `kind` ('llm' or 'tts')."""
+        with self._lock:
+            setattr(self, kind, getattr(self, kind) + 1)
+
+    def snapshot(self):
+        """
+        Returns:
+        - dict: {"llm": int, "tts": int}
+        """
+        with self._lock:
+            return {"llm": self.llm, "tts": self.tts}
+
+
+# Counter of the script run this code is working for, if any
+_CALL_COUNTER = contextvars.ContextVar("talkiee_call_counter", default=None)
+
+
+def reset_call_counts():
+    """
+    Start counting LLM/TTS calls for a new script run.
+
+    Returns:
+    - CallCounter: The counter now in effect for this thread and the work it submits.
+    """
+    counter = CallCounter()
+    _CALL_COUNTER.set(counter)
+    return counter
+
+
+def get_call_counts(counter=None):
+    """
+    Get the number of LLM and TTS calls made since the last reset.
+
+    Args:
+    - counter (CallCounter, optional): Defaults to the current run's counter.
+
+    Returns:
+    - dict: {"llm": int, "tts": int}
+    """
+    counter = counter or _CALL_COUNTER.get()
+    return counter.snapshot() if counter else {"llm": 0, "tts": 0}
+
+
+def _count_call(kind):
+    """Count a call of `kind` ('llm' or 'tts') against the current run, if any."""
+    counter = _CALL_COUNTER.get()
+    if counter is not None:
+        counter.add(kind)
+
+
+def _submit_counted(pool, func, *args):
+    """`pool.submit(func, *args)`, with calls counted against the submitting run."""
+    return pool.submit(contextvars.copy_context().run, func, *args)
+
+
+def _submit_background(pool, func, *args):
+    """`pool.submit(func, *args)`, with calls not counted against any run."""
+    return pool.submit(contextvars.Context().run, func, *args)
+
+
+def _map_counted(pool, func, items):
+    """Ordered results of `func(item)` on `pool`, counted against the submitting run."""
+    futures = [_submit_counted(pool, func, item) for item in items]
+    return (future.result() for future in futures)
+
+# Process-wide registry of heavy resources: the LLM loop and client, STT and
+# TTS engines, recognizers and worker pools. Each is created once, on first
+# use or by `warm_up()` at server start, and shared by every session.
+_RESOURCES = {}
+_RESOURCE_LOCKS = collections.defaultdict(threading.Lock)
+_RESOURCE_REGISTRY_LOCK = threading.Lock()
+_RESOURCE_LOAD_TIMES = {}
+
+
+def get_resource(name, factory):
+    """
+    Get a process-wide resource, creating it with `factory()` on first use.
+
+    Concurrent callers for the same resource wait for a single creation;
+    different resources load independently. If `factory()` raises, nothing
+    is stored and the next caller tries again.
+
+    Args:
+    - name (str): Registry key, e.g. "llm_client" or "stt:whisper".
+    - factory (callable): Zero-argument function that builds the resource.
+
+    Returns:
+    - Any: The shared resource.
+    """
+    if name in _RESOURCES:
+        return _RESOURCES[name]
+    with _RESOURCE_REGISTRY_LOCK:
+        lock = _RESOURCE_LOCKS[name]
+    with lock:
+        if name not in _RESOURCES:
+            start = time.perf_counter()
+            _RESOURCES[name] = factory()
+            _RESOURCE_LOAD_TIMES[name] = time.perf_counter() - start
+        return _RESOURCES[name]
+
+
+def set_resource(name, resource):
+    """
+    Replace a registered resource, e.g. after reconfiguration.
+
+    Args:
+    - name (str): Registry key.
+    - resource (Any): The new resource, or None to drop it so the next
+      `get_resource()` call builds it again.
+    """
+    with _RESOURCE_REGISTRY_LOCK:
+        lock = _RESOURCE_LOCKS[name]
+    with lock:
+        if resource is None:
+            _RESOURCES.pop(name, None)
+        else:
+            _RESOURCES[name] = resource
+
+
+def get_resource_load_times():
+    """
+    Get how long each registered resource took to create.
+
+    Returns:
+    - dict: Registry key to seconds.
+    """
+    return dict(_RESOURCE_LOAD_TIMES)
+
+
+def _start_llm_loop():
+    """Start an event loop on a daemon thread."""
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="talkiee-llm-loop", daemon=True).start()
+    return loop
+
+
+def get_llm_loop():
+    """
+    Get the background event loop, starting it on first use.
+
+    All async LLM I/O runs on this long-lived loop so the HTTP connection
+    pool survives between Streamlit reruns and sessions.
+
+    Returns:
+    - asyncio.AbstractEventLoop: The running loop.
+    """
+    return get_resource("llm_loop", _start_llm_loop)
+
+
+def run_async(coro, timeout=None):
+    """
+    Run a coroutine on the background loop and wait for its result.
+
+    Args:
+    - coro (coroutine): The coroutine to run.
+    - timeout (float, optional): Seconds to wait for the result.
+
+    Returns:
+    - Any: The coroutine's result.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, get_llm_loop()).result(timeout)
+
+
 async def configure_llm():
     """Configure and validate API key for LLM.
+
+    The client is a natively async HTTP client for the OpenAI-compatible
+    chat completions API. It keeps pooled keep-alive connections and uses
+    HTTP/2 when `h2` is installed (the `httpx[http2]` requirement).
     
+    Rebuilds the client from the environment and replaces the shared one.
+
     Returns:
-    - str: The Open AI client 
+    - httpx.AsyncClient: The LLM API client
     
     Raises:
     - ValueError: If the API key is not found in the environment variables.
     """
-    global _GLOBAL_LLM_CLIENT
-    
+    client = _build_llm_client()
+    set_resource("llm_client", client)
+    return client
+
+
+def _build_llm_client():
+    """Build the LLM API client from the environment."""
     api_key = os.getenv("XAI_API_KEY")
     if not api_key:
         raise ValueError("API key not found")
 
-    _GLOBAL_LLM_CLIENT = OpenAI(
-        api_key=api_key,
-        base_url="https://api.x.ai/v1"
+    return httpx.AsyncClient(
+        base_url=os.getenv("XAI_BASE_URL", "https://api.x.ai/v1"),
+        headers={"Authorization": f"Bearer {api_key}"},
+        http2=importlib.util.find_spec("h2") is not None,
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=20, keepalive_expiry=120),
+        timeout=httpx.Timeout(60.0, connect=10.0),
     )
-    return _GLOBAL_LLM_CLIENT
 
-async def call_grok(prompt, max_retries=3):
-    """
-    Asynchronous Grok API call with retries.
 
-    Args:
-    - prompt (str): The prompt.
-    - max_retries (int): Maximum retries.
-    - timeout (int): Timeout for the request.
+def get_llm_client():
+    """
+    Get the shared LLM API client, building it on first use.
 
     Returns:
-    - str: Grok response.
+    - httpx.AsyncClient: The LLM API client
+
+    Raises:
+    - ValueError: If the API key is not found in the environment variables.
     """
-    global _GLOBAL_LLM_CLIENT
-    if _GLOBAL_LLM_CLIENT is None:
-        try:
-           await  configure_llm()
-        except Exception as config_error:
-            return f"Configuration Error: {config_error}"
+    return get_resource("llm_client", _build_llm_client)
+
+def _grok_payload(prompt, stream=False):
+    """Build the chat completions request body for `prompt`."""
     payload = {
         "model": "grok-2-latest",
         "messages": [
@@ -74,284 +277,2477 @@ async def call_grok(prompt, max_retries=3):
         "max_tokens": 512,    
         "temperature": 0.7
     }
+    if stream:
+        payload["stream"] = True
+    return payload
+
+# Request priorities: lower values are admitted first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+
+# Default priority of LLM calls made from the current thread
+_THREAD_PRIORITY = threading.local()
+
+
+def _run_as_background():
+    """Thread pool initializer: LLM calls from this thread default to background priority."""
+    _THREAD_PRIORITY.value = PRIORITY_BACKGROUND
+
+
+LLM_MAX_IN_FLIGHT = int(os.getenv("TALKIEE_LLM_MAX_IN_FLIGHT", 8))
+LLM_RATE_LIMIT = float(os.getenv("TALKIEE_LLM_RATE", 5.0))
+LLM_RATE_BURST = int(os.getenv("TALKIEE_LLM_BURST", 10))
+
+
+class LLMScheduler:
+    """
+    Process-wide admission control for LLM API requests.
+
+    Requests wait in a priority queue and are admitted while fewer than
+    `max_in_flight` are running and the token bucket (`rate` requests per
+    second, bursts up to `burst`) has a token. A rate-limit response
+    pauses admissions for everyone via `backoff()`.
+
+    All methods run on the LLM event loop (see `get_llm_loop`).
+
+    Args:
+    - max_in_flight (int): Maximum concurrent requests.
+    - rate (float): Sustained requests per second.
+    - burst (int): Token bucket capacity.
+    """
+
+    def __init__(self, max_in_flight=LLM_MAX_IN_FLIGHT, rate=LLM_RATE_LIMIT, burst=LLM_RATE_BURST):
+        self.max_in_flight = max_in_flight
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._refilled_at = time.monotonic()
+        self._paused_until = 0.0
+        self._waiting = []
+        self._sequence = 0
+        self._in_flight = 0
+        self._timer = None
+        self.stats = {
+            "queued": 0, "max_queued": 0, "in_flight": 0, "admitted": 0,
+            "throttled": 0, "wait_seconds": 0.0,
+        }
+
+    @contextlib.asynccontextmanager
+    async def slot(self, priority=PRIORITY_INTERACTIVE):
+        """Wait for admission, hold a request slot for the `async with` body."""
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(self, priority=PRIORITY_INTERACTIVE):
+        """Wait until a request of `priority` may be sent."""
+        future = asyncio.get_running_loop().create_future()
+        self._sequence += 1
+        heapq.heappush(self._waiting, (priority, self._sequence, future))
+        self._update_queue_stats()
+        start = time.monotonic()
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Admitted just before the cancellation: give the slot back
+                self.release()
+            raise
+        self.stats["wait_seconds"] += time.monotonic() - start
+
+    def release(self):
+        """Free a request slot."""
+        self._in_flight -= 1
+        self.stats["in_flight"] = self._in_flight
+        self._dispatch()
+
+    def backoff(self, delay):
+        """Pause all admissions for `delay` seconds after a rate-limit response."""
+        self.stats["throttled"] += 1
+        self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        # Tokens earned before the pause would release a burst right after it
+        self._tokens = min(self._tokens, 1.0)
+
+    def _delay(self):
+        """Seconds until the next request may start (0 if now)."""
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self._tokens >= 1:
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    def _dispatch(self):
+        while self._waiting and self._in_flight < self.max_in_flight:
+            if self._waiting[0][2].done():
+                heapq.heappop(self._waiting)
+                continue
+            delay = self._delay()
+            if delay > 0:
+                if self._timer is None:
+                    self._timer = asyncio.get_running_loop().call_later(delay, self._on_timer)
+                break
+            _, _, future = heapq.heappop(self._waiting)
+            self._tokens -= 1
+            self._in_flight += 1
+            self.stats["admitted"] += 1
+            self.stats["in_flight"] = self._in_flight
+            future.set_result(None)
+        self._update_queue_stats()
+
+    def _on_timer(self):
+        self._timer = None
+        self._dispatch()
+
+    def _update_queue_stats(self):
+        queued = sum(1 for _, _, future in self._waiting if not future.done())
+        self.stats["queued"] = queued
+        self.stats["max_queued"] = max(self.stats["max_queued"], queued)
+
+
+def get_llm_scheduler():
+    """Get the process-wide LLM request scheduler."""
+    return get_resource("llm_scheduler", LLMScheduler)
+
+
+def get_llm_scheduler_stats():
+    """
+    Get LLM scheduler metrics.
+
+    Returns:
+    - dict: "queued" (waiting now), "max_queued", "in_flight", "admitted",
+      "throttled" (rate-limit responses), "wait_seconds" (total queueing time)
+      and "avg_wait_ms" per admitted request.
+    """
+    stats = dict(get_llm_scheduler().stats)
+    stats["avg_wait_ms"] = 1000 * stats["wait_seconds"] / stats["admitted"] if stats["admitted"] else 0.0
+    return stats
+
+
+def _retry_after_seconds(response):
+    """
+    Parse a Retry-After header (seconds or HTTP date).
+
+    Returns:
+    - float or None: Seconds to wait, or None if the header is absent or invalid.
+    """
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def _backoff_delay(attempt, base=0.5, cap=30.0):
+    """Exponential backoff with jitter: half fixed, half random, so clients spread out."""
+    delay = min(cap, base * 2 ** attempt)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+async def call_grok(prompt, max_retries=3, priority=PRIORITY_INTERACTIVE):
+    """
+    Asynchronous Grok API call with retries.
+
+    Must run on the background loop (see `run_async`), which owns the client.
+    Requests are admitted by the shared `LLMScheduler`.
+
+    Args:
+    - prompt (str): The prompt.
+    - max_retries (int): Maximum retries.
+    - priority (int): `PRIORITY_INTERACTIVE` or `PRIORITY_BACKGROUND`.
+
+    Returns:
+    - str: Grok response.
+    """
+    try:
+        client = get_llm_client()
+    except Exception as config_error:
+        return f"Configuration Error: {config_error}"
+    payload = _grok_payload(prompt)
+    scheduler = get_llm_scheduler()
 
     for attempt in range(max_retries):
         try:
-            response = await asyncio.to_thread(
-                _GLOBAL_LLM_CLIENT.chat.completions.create,
-                **payload
-            )
-            if response and response.choices:
-                return response.choices[0].message.content
+            async with scheduler.slot(priority):
+                response = await client.post("/chat/completions", json=payload)
+                if response.status_code == 429:
+                    delay = _retry_after_seconds(response) or _backoff_delay(attempt)
+                    print(f"Rate limit exceeded. Backing off for {delay:.1f}s.")
+                    # Pause admissions before releasing the slot, so no queued request slips in
+                    scheduler.backoff(delay)
+                    continue
+            if response.status_code == 400:
+                print(f"Invalid request. Check your payload: {response.text}")
+                break
+            response.raise_for_status()
+
+            choices = response.json().get("choices")
+            if choices:
+                return choices[0]["message"]["content"]
             else:
             
                 continue
 
         except Exception as e:
             print(f"API Call Error (Attempt {attempt + 1}/{max_retries}): {e}")
-            if hasattr(e, 'http_status') and e.http_status == 429:
-                print("Rate limit exceeded. Backing off.")
-                await asyncio.sleep(2 ** attempt)
-                continue
-            elif hasattr(e, 'type') and e.type == 'invalid_request_error':
-                print("Invalid request. Check your payload.")
-                break
+            if attempt < max_retries - 1:
+                await asyncio.sleep(_backoff_delay(attempt))
 
     return "Failed to get a response after multiple attempts."
 
+
+async def stream_grok(prompt, max_retries=3, priority=PRIORITY_INTERACTIVE, status=None):
+    """
+    Asynchronous streaming Grok API call.
+
+    Yields the completion as text deltas while it is generated. Failures
+    before the first delta are retried like `call_grok`. The request holds
+    a scheduler slot until the stream ends.
+
+    Args:
+    - prompt (str): The prompt.
+    - max_retries (int): Maximum retries.
+    - priority (int): `PRIORITY_INTERACTIVE` or `PRIORITY_BACKGROUND`.
+    - status (dict, optional): Set to {"complete": True} once the server
+      marks the end of the completion; stays unset if the stream broke off.
+
+    Yields:
+    - str: The next piece of the response.
+    """
+    try:
+        client = get_llm_client()
+    except Exception as config_error:
+        yield f"Configuration Error: {config_error}"
+        return
+    payload = _grok_payload(prompt, stream=True)
+    scheduler = get_llm_scheduler()
+
+    for attempt in range(max_retries):
+        started = False
+        try:
+            async with scheduler.slot(priority), \
+                    client.stream("POST", "/chat/completions", json=payload) as response:
+                if response.status_code == 429:
+                    delay = _retry_after_seconds(response) or _backoff_delay(attempt)
+                    print(f"Rate limit exceeded. Backing off for {delay:.1f}s.")
+                    # Pause admissions before releasing the slot, so no queued request slips in
+                    scheduler.backoff(delay)
+                    continue
+                elif response.status_code == 400:
+                    await response.aread()
+                    print(f"Invalid request. Check your payload: {response.text}")
+                    break
+                response.raise_for_status()
+
+                # Server-sent events: one "data: {json}" line per chunk
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        if status is not None:
+                            status["complete"] = True
+                        break
+                    choices = json.loads(data).get("choices") or [{}]
+                    if choices[0].get("finish_reason") and status is not None:
+                        status["complete"] = True
+                    delta = (choices[0].get("delta") or {}).get("content")
+                    if delta:
+                        started = True
+                        yield delta
+            if started:
+                return
+
+        except Exception as e:
+            print(f"API Call Error (Attempt {attempt + 1}/{max_retries}): {e}")
+            if started:
+                return
+            if attempt < max_retries - 1:
+                await asyncio.sleep(_backoff_delay(attempt))
+
+    yield "Failed to get a response after multiple attempts."
+
+
+# Time-to-first-token and total latency of recent LLM calls
+_LLM_LATENCIES = collections.deque(maxlen=200)
+
+
+def get_llm_latencies():
+    """
+    Get latency records of recent LLM calls, oldest first.
+
+    Returns:
+    - list: Dicts with "ttft" and "total" (seconds) and "stream" (bool).
+    """
+    return list(_LLM_LATENCIES)
+
+
+def iter_grok(prompt, priority=PRIORITY_INTERACTIVE, status=None):
+    """
+    Synchronous generator over `stream_grok` for the Streamlit code.
+
+    Deltas are produced on the background loop and handed over through a
+    queue, so they can be rendered on the calling thread as they arrive.
+
+    Args:
+    - prompt (str): The prompt.
+    - priority (int): `PRIORITY_INTERACTIVE` or `PRIORITY_BACKGROUND`.
+    - status (dict, optional): See `stream_grok`.
+
+    Yields:
+    - str: The next piece of the response.
+    """
+    deltas = queue.Queue()
+    done = object()
+
+    async def pump():
+        try:
+            async for delta in stream_grok(prompt, priority=priority, status=status):
+                deltas.put(delta)
+        finally:
+            deltas.put(done)
+
+    start = time.perf_counter()
+    ttft = None
+    future = asyncio.run_coroutine_threadsafe(pump(), get_llm_loop())
+    while (delta := deltas.get()) is not done:
+        if ttft is None:
+            ttft = time.perf_counter() - start
+        yield delta
+    future.result()
+
+    total = time.perf_counter() - start
+    _LLM_LATENCIES.append({"ttft": total if ttft is None else ttft, "total": total, "stream": True})
+
+
+def _evict_lru_files(directory, max_bytes):
+    """
+    Delete least recently used files in `directory` until it fits `max_bytes`.
+
+    Files are ordered by modification time, so readers touch files on a hit.
+    In-progress ".part" files are never counted or removed.
+
+    Returns:
+    - int: Number of files deleted.
+    """
+    entries = []
+    total_size = 0
+    for entry in os.scandir(directory):
+        if entry.is_file() and not entry.name.endswith(".part"):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total_size += stat.st_size
+
+    evicted = 0
+    entries.sort()
+    for _, size, path in entries:
+        if total_size <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total_size -= size
+        evicted += 1
+    return evicted
+
+
+class SingleFlight:
+    """
+    Share one execution among concurrent identical calls.
+
+    The first caller for a key runs the function; callers that arrive while
+    it is running wait for the same result instead of repeating the work.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.stats = {"executed": 0, "coalesced": 0}
+
+    def do(self, key, func):
+        """
+        Run `func()` unless an identical call is already in flight.
+
+        Args:
+        - key (hashable): Identifies identical calls.
+        - func (callable): Zero-argument function doing the work.
+
+        Returns:
+        - tuple: (Any, bool)
+            - The result (exceptions propagate to every waiting caller).
+            - True if the result came from another caller's execution.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            if future is None:
+                future = self._calls[key] = concurrent.futures.Future()
+                self.stats["executed"] += 1
+                leader = True
+            else:
+                self.stats["coalesced"] += 1
+                leader = False
+
+        if not leader:
+            return future.result(), True
+        try:
+            result = func()
+            future.set_result(result)
+            return result, False
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+# LLM response cache: an in-memory LRU in front of a persistent directory of
+# JSON files. Keys are the normalized request (model, prompt, temperature,
+# max_tokens), so resubmitting the same document or summary is a lookup.
+LLM_CACHE_TTL = float(os.getenv("TALKIEE_LLM_CACHE_TTL", 24 * 60 * 60))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("TALKIEE_LLM_CACHE_MAX_ENTRIES", 256))
+LLM_CACHE_DIR = os.getenv(
+    "TALKIEE_LLM_CACHE_DIR", os.path.join(tempfile.gettempdir(), "talkiee_llm_cache")
+)
+LLM_CACHE_MAX_BYTES = int(os.getenv("TALKIEE_LLM_CACHE_MAX_BYTES", 50 * 1024 * 1024))
+
+_LLM_CACHE = collections.OrderedDict()
+_LLM_CACHE_LOCK = threading.Lock()
+_LLM_CACHE_STATS = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "saved_seconds": 0.0}
+# Concurrent misses for the same cache key share one API call
+_LLM_FLIGHTS = SingleFlight()
+
+# Responses that report a failure instead of an answer are never cached
+_LLM_ERROR_PREFIXES = ("Configuration Error:", "Failed to get a response")
+
+
+def _llm_cache_key(prompt):
+    """
+    Build the cache key for a chat completions request.
+
+    Whitespace in the prompt is collapsed so reformatted but identical text
+    (e.g. a re-extracted document) maps to the same entry.
+    """
+    payload = _grok_payload(" ".join(prompt.split()))
+    request = [payload["model"], payload["messages"], payload["temperature"], payload["max_tokens"]]
+    return hashlib.sha256(json.dumps(request).encode("utf-8")).hexdigest()
+
+
+def _llm_cache_get(key):
+    """Look up a cached response in memory, then on disk. Returns (response, latency) or None."""
+    now = time.time()
+    with _LLM_CACHE_LOCK:
+        entry = _LLM_CACHE.get(key)
+        if entry is not None:
+            if now - entry["created"] <= LLM_CACHE_TTL:
+                _LLM_CACHE.move_to_end(key)
+                _LLM_CACHE_STATS["hits"] += 1
+                _LLM_CACHE_STATS["saved_seconds"] += entry["latency"]
+                return entry["response"], entry["latency"]
+            del _LLM_CACHE[key]
+
+    path = os.path.join(LLM_CACHE_DIR, f"{key}.json")
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        entry = None
+
+    with _LLM_CACHE_LOCK:
+        if entry is None or now - entry["created"] > LLM_CACHE_TTL:
+            _LLM_CACHE_STATS["misses"] += 1
+            return None
+        _llm_cache_remember(key, entry)
+        _LLM_CACHE_STATS["hits"] += 1
+        _LLM_CACHE_STATS["disk_hits"] += 1
+        _LLM_CACHE_STATS["saved_seconds"] += entry["latency"]
+    # Touch the file so eviction treats it as recently used
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return entry["response"], entry["latency"]
+
+
+def _llm_cache_remember(key, entry):
+    """Insert into the in-memory LRU; caller holds `_LLM_CACHE_LOCK`."""
+    _LLM_CACHE[key] = entry
+    _LLM_CACHE.move_to_end(key)
+    while len(_LLM_CACHE) > LLM_CACHE_MAX_ENTRIES:
+        _LLM_CACHE.popitem(last=False)
+        _LLM_CACHE_STATS["evictions"] += 1
+
+
+def _llm_cache_put(key, response, latency):
+    """Store a response in both tiers."""
+    if not response or response.startswith(_LLM_ERROR_PREFIXES):
+        return
+    entry = {"created": time.time(), "latency": latency, "response": response}
+    with _LLM_CACHE_LOCK:
+        _llm_cache_remember(key, entry)
+
+    try:
+        os.makedirs(LLM_CACHE_DIR, exist_ok=True)
+        # Write to a scratch file and rename so readers never see a partial entry
+        with tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", delete=False, suffix=".part", dir=LLM_CACHE_DIR
+        ) as temp_file:
+            json.dump(entry, temp_file)
+        os.replace(temp_file.name, os.path.join(LLM_CACHE_DIR, f"{key}.json"))
+        evicted = _evict_lru_files(LLM_CACHE_DIR, LLM_CACHE_MAX_BYTES)
+    except OSError as e:
+        print(f"LLM cache write failed: {e}")
+        return
+    with _LLM_CACHE_LOCK:
+        _LLM_CACHE_STATS["evictions"] += evicted
+
+
+def get_llm_cache_stats():
+    """
+    Get LLM response cache counters.
+
+    Returns:
+    - dict: "hits", "disk_hits", "misses", "evictions", "hit_rate" (0-1),
+      "saved_seconds" (sum of the original latency of every cached answer served)
+      and "coalesced" (misses that shared another caller's in-flight request).
+    """
+    with _LLM_CACHE_LOCK:
+        stats = dict(_LLM_CACHE_STATS)
+    stats["coalesced"] = _LLM_FLIGHTS.stats["coalesced"]
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+    return stats
+
+
+def ask_grok(prompt, on_token=None, use_cache=False, priority=None):
+    """
+    Synchronous facade over `call_grok` for the Streamlit code.
+
+    Identical concurrent prompts share one API call whether or not the cache
+    is used, so e.g. several sessions filling the same content pool topic
+    make a single request.
+
+    Args:
+    - prompt (str): The prompt.
+    - on_token (callable, optional): When given, the response is streamed and
+      `on_token(delta)` is called on this thread for every delta. A cached
+      or shared response is delivered as a single delta. An exception from
+      the callback is raised to this caller only, after the shared call has
+      finished for everyone waiting on it.
+    - use_cache (bool): Serve and store the response in the LLM response
+      cache. Only for prompts that fully determine the answer (no
+      conversation state); a stream that broke off early is never stored.
+    - priority (int, optional): Scheduler priority. Defaults to the calling
+      thread's priority: background on prefetch workers, else interactive.
+
+    Returns:
+    - str: Grok response.
+    """
+    if priority is None:
+        priority = getattr(_THREAD_PRIORITY, "value", PRIORITY_INTERACTIVE)
+    key = _llm_cache_key(prompt)
+    use_cache = use_cache and LLM_CACHE_TTL > 0
+    if use_cache:
+        cached = _llm_cache_get(key)
+        if cached is not None:
+            response = cached[0]
+            if on_token is not None:
+                on_token(response)
+            return response
+
+    # The leader's UI callback runs inside the shared call: keep its failure
+    # (e.g. a stopped Streamlit script) away from the followers.
+    callback_errors = []
+
+    def tee(delta):
+        if callback_errors:
+            return
+        try:
+            on_token(delta)
+        except BaseException as e:
+            callback_errors.append(e)
+
+    def fetch():
+        start = time.perf_counter()
+        response, complete = _fetch_grok(prompt, tee if on_token else None, priority)
+        if use_cache and complete:
+            _llm_cache_put(key, response, time.perf_counter() - start)
+        return response
+
+    response, shared = _LLM_FLIGHTS.do(key, fetch)
+    if callback_errors:
+        raise callback_errors[0]
+    if shared and on_token is not None:
+        on_token(response)
+    return response
+
+
+def _fetch_grok(prompt, on_token, priority):
+    """
+    Call the API for `ask_grok`, streaming if `on_token` is given.
+
+    Returns (response, complete); `complete` is False if the stream broke off.
+    """
+    _count_call("llm")
+    if on_token is not None:
+        parts = []
+        status = {}
+        for delta in iter_grok(prompt, priority, status):
+            parts.append(delta)
+            on_token(delta)
+        return "".join(parts), status.get("complete", False)
+
+    start = time.perf_counter()
+    response = run_async(call_grok(prompt, priority=priority))
+    total = time.perf_counter() - start
+    _LLM_LATENCIES.append({"ttft": total, "total": total, "stream": False})
+    return response, True
+
+
 # -------------------------
 # 2. AUDIO INPUT & ANALYSIS
 # -------------------------
 
-def speech_to_text():
+# Concurrent speech recognition requests per uploaded file
+STT_MAX_WORKERS = int(os.getenv("TALKIEE_STT_WORKERS", 4))
+
+# Voice activity detection: only voiced audio is sent to speech recognition.
+# A frame is voiced when its energy is VAD_MARGIN_DB above the noise floor;
+# pauses shorter than VAD_MIN_SILENCE seconds stay inside a segment.
+VAD_ENABLED = os.getenv("TALKIEE_VAD", "1") != "0"
+VAD_MARGIN_DB = float(os.getenv("TALKIEE_VAD_MARGIN_DB", 12))
+VAD_MIN_SILENCE = float(os.getenv("TALKIEE_VAD_MIN_SILENCE", 0.5))
+# Optional absolute floor (dBFS): frames quieter than this are never speech.
+# Off by default, so a quiet but real recording is judged against its own
+# noise floor; silent and steady-noise takes have no dynamic range anyway.
+VAD_FLOOR_DB = float(os.getenv("TALKIEE_VAD_FLOOR_DB", "-inf"))
+
+def record_speech(timeout=5, phrase_time_limit=60):
     """
-    Capture voice input from the microphone and transcribe it to text.
-    
+    Record one phrase from the microphone.
+
+    Args:
+    - timeout (float): Seconds to wait for speech to start.
+    - phrase_time_limit (float): Maximum phrase length in seconds.
+
     Returns:
-    - tuple: (str, str or None) 
-        - The transcribed text (str).
-        - The path to the saved audio file (str) .
-    
+    - sr.AudioData: The recorded audio.
+
     Exceptions:
     - sr.WaitTimeoutError: Raised when no speech is detected within the timeout period.
-    - sr.UnknownValueError: Raised when speech cannot be understood.
-    - sr.RequestError: Raised when there's an issue with the speech recognition service.
-    - Exception: Captures any other unexpected errors.
     """
     recognizer = sr.Recognizer()
 
     with sr.Microphone() as source:
-        try:
-            recognizer.adjust_for_ambient_noise(source, duration=0.5) 
-            
-            print("Listening...")
-            audio = recognizer.listen(source, timeout=5, phrase_time_limit=60)
-            audio_file = "temp_audio.wav"
-            with open(audio_file, "wb") as f:
-                f.write(audio.get_wav_data())
-                
-            spoken_text = recognizer.recognize_google(audio)
-            return spoken_text, audio_file
+        recognizer.adjust_for_ambient_noise(source, duration=0.5) 
         
-        except sr.WaitTimeoutError:
-            return "Timeout: No speech detected", None
-        except sr.UnknownValueError:
-            return "Could not understand audio", None
-        except sr.RequestError as e:
-            return f"Speech recognition service error: {e}", None
-        except Exception as e:
-            return f"Unexpected error: {e}", None
+        print("Listening...")
+        return recognizer.listen(source, timeout=timeout, phrase_time_limit=phrase_time_limit)
+
+
+def speech_error_message(error):
+    """
+    Map a recording or recognition error to the message shown to the user.
+
+    Args:
+    - error (Exception): The raised error.
+
+    Returns:
+    - str: User-facing message.
+    """
+    if isinstance(error, sr.WaitTimeoutError):
+        return "Timeout: No speech detected"
+    if isinstance(error, sr.UnknownValueError):
+        return "Could not understand audio"
+    if isinstance(error, sr.RequestError):
+        return f"Speech recognition service error: {error}"
+    return f"Unexpected error: {error}"
+
+
+def speech_to_text():
+    """
+    Capture voice input from the microphone and transcribe it to text.
+    
+    Returns:
+    - tuple: (str, str or None) 
+        - The transcribed text (str).
+        - The path to the saved audio file (str) .
+    
+    Exceptions:
+    - sr.WaitTimeoutError: Raised when no speech is detected within the timeout period.
+    - sr.UnknownValueError: Raised when speech cannot be understood.
+    - sr.RequestError: Raised when there's an issue with the speech recognition service.
+    - Exception: Captures any other unexpected errors.
+    """
+    try:
+        audio = record_speech()
+        audio_file = "temp_audio.wav"
+        with open(audio_file, "wb") as f:
+            f.write(audio.get_wav_data())
+
+        if VAD_ENABLED:
+            audio = voiced_audio_data(audio)
+            if audio is None:
+                raise sr.UnknownValueError()
+        spoken_text = transcribe_audio(audio)
+        return spoken_text, audio_file
+
+    except Exception as e:
+        return speech_error_message(e), None
+
+def _pitch_frame_stats(S, sr, n_fft, fmin=150.0, fmax=4000.0, threshold=0.1):
+    """
+    Per-frame pitch sums and peak counts, equivalent to `librosa.piptrack`.
+
+    Only the bins inside [fmin, fmax) (plus one neighbour each side) are
+    processed, instead of interpolating the whole spectrogram and masking.
+
+    Args:
+    - S (np.ndarray): Magnitude spectrogram, shape (bins, frames).
+    - sr (int): Sample rate in Hz.
+    - n_fft (int): FFT size used for `S`.
+    - fmin (float): Lowest pitch frequency in Hz.
+    - fmax (float): Highest pitch frequency in Hz.
+    - threshold (float): Peak threshold relative to each frame's maximum.
+
+    Returns:
+    - tuple: (np.ndarray, np.ndarray)
+        - Sum of the interpolated peak frequencies per frame.
+        - Number of peaks per frame.
+    """
+    n_bins, n_frames = S.shape
+    fft_freqs = np.arange(n_bins) * sr / n_fft
+    in_band = np.flatnonzero((fft_freqs >= fmin) & (fft_freqs < min(fmax, sr / 2)))
+    if len(in_band) == 0:
+        return np.zeros(n_frames), np.zeros(n_frames)
+
+    lo, hi = in_band[0], in_band[-1] + 1
+    band = S[np.arange(lo - 1, hi + 1).clip(0, n_bins - 1)]
+
+    # Local maxima of the thresholded magnitudes
+    gated = band * (band > threshold * S.max(axis=0))
+    peaks = (gated[1:-1] > gated[:-2]) & (gated[1:-1] >= gated[2:])
+
+    # Parabolic interpolation of each peak's position
+    a = band[2:] + band[:-2] - 2 * band[1:-1]
+    b = (band[2:] - band[:-2]) / 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        shift = np.where(np.abs(b) < np.abs(a), -b / a, 0.0)
+    bins = np.arange(lo, hi)
+    shift[(bins == 0) | (bins == n_bins - 1)] = 0.0
+
+    freqs = (bins[:, None] + shift) * (sr / n_fft)
+    return np.where(peaks, freqs, 0.0).sum(axis=0), peaks.sum(axis=0)
+
+
+class PitchPaceAnalyzer:
+    """
+    Incremental pitch and pace statistics from a single frame-level STFT pass.
+
+    Samples are fed with `update()` in any block size; every complete frame is
+    analysed once and reduced straight away to per-window pitch totals and a
+    per-frame RMS value. Memory is bounded by the block size plus 4 bytes per
+    frame (about 1.3 MB per hour of 48 kHz audio) instead of the decoded signal.
+
+    Args:
+    - sr (int): Sample rate in Hz.
+    - window_size (float): Length in seconds of each per-window result.
+    - n_fft (int): FFT size.
+    - hop_length (int): Samples between frames.
+    - top_db (float): Threshold below the peak RMS (dB) treated as silence.
+    - block_frames (int): Maximum frames per STFT call.
+    """
 
-def analyze_audio(file_path,chunk_size=10):
+    def __init__(self, sr, window_size=10, n_fft=2048, hop_length=512, top_db=60, block_frames=4096):
+        self.sr = sr
+        self.window_size = window_size
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.top_db = top_db
+        self.block_frames = block_frames
+
+        # Same framing as a centered STFT: the stream starts with n_fft // 2 zeros
+        self._buffer = np.zeros(n_fft // 2, dtype=np.float32)
+        self._n_samples = 0
+        self._n_frames = 0
+        self._rms = []
+        self._window_pitch_sum = np.zeros(0)
+        self._window_pitch_count = np.zeros(0)
+
+    def update(self, samples):
+        """
+        Feed the next block of mono samples.
+
+        Args:
+        - samples (np.ndarray): Mono audio samples.
+        """
+        self._n_samples += len(samples)
+        self._buffer = np.concatenate((self._buffer, np.asarray(samples, dtype=np.float32)))
+        self._process_frames()
+
+    def _process_frames(self):
+        """Analyse every complete frame in the buffer and drop the consumed samples."""
+        n_fft, hop_length = self.n_fft, self.hop_length
+        while len(self._buffer) >= n_fft:
+            n_frames = min(1 + (len(self._buffer) - n_fft) // hop_length, self.block_frames)
+            segment = self._buffer[:(n_frames - 1) * hop_length + n_fft]
+            S = np.abs(librosa.stft(segment, n_fft=n_fft, hop_length=hop_length, center=False))
+
+            pitch_sum, pitch_count = _pitch_frame_stats(S, self.sr, n_fft)
+            self._rms.append(librosa.feature.rms(S=S, frame_length=n_fft)[0].astype(np.float32))
+
+            frames = np.arange(self._n_frames, self._n_frames + n_frames)
+            frame_window = self._frame_windows(frames)
+            self._window_pitch_sum = _add_bincount(self._window_pitch_sum, frame_window, pitch_sum)
+            self._window_pitch_count = _add_bincount(self._window_pitch_count, frame_window, pitch_count)
+
+            self._n_frames += n_frames
+            self._buffer = self._buffer[n_frames * hop_length:]
+
+    def _frame_windows(self, frames):
+        """Map frame indices to the index of the analysis window they fall in."""
+        return (frames * self.hop_length / self.sr // self.window_size).astype(int)
+
+    def finalize(self):
+        """
+        Flush the trailing frames and compute the final statistics.
+
+        Returns:
+        - dict:
+            - "pitch" (float): Average pitch in Hz over voiced bins.
+            - "pace" (float): Voiced segments per second.
+            - "voiced_segments" (int): Number of non-silent segments.
+            - "duration" (float): Length in seconds.
+            - "windows" (list): Per-window dicts with "start", "end", "pitch",
+              "pace" and "voiced_segments".
+        """
+        duration = self._n_samples / self.sr if self.sr else 0
+        if duration == 0:
+            return {"pitch": 0.0, "pace": 0.0, "voiced_segments": 0, "duration": 0.0, "windows": []}
+
+        # Trailing n_fft // 2 zeros complete the centered framing
+        self._buffer = np.concatenate((self._buffer, np.zeros(self.n_fft // 2, dtype=np.float32)))
+        self._process_frames()
+        self._buffer = np.zeros(0, dtype=np.float32)
+
+        # Voiced frames: within top_db of the loudest frame, as in librosa.effects.split
+        rms = np.concatenate(self._rms)
+        voiced = librosa.amplitude_to_db(rms, ref=np.max(rms), top_db=None) > -self.top_db
+        segment_starts = np.flatnonzero(voiced & ~np.concatenate(([False], voiced[:-1])))
+
+        n_windows = int(np.ceil(duration / self.window_size))
+        frame_window = np.minimum(self._frame_windows(segment_starts), n_windows - 1)
+        window_segments = np.bincount(frame_window, minlength=n_windows)
+        window_pitch_sum = _fold_windows(self._window_pitch_sum, n_windows)
+        window_pitch_count = _fold_windows(self._window_pitch_count, n_windows)
+
+        window_starts = np.arange(n_windows) * self.window_size
+        window_ends = np.minimum(window_starts + self.window_size, duration)
+        window_pitch = np.divide(
+            window_pitch_sum, window_pitch_count,
+            out=np.zeros(n_windows), where=window_pitch_count > 0
+        )
+        window_pace = window_segments / (window_ends - window_starts)
+
+        total_count = window_pitch_count.sum()
+        return {
+            "pitch": float(window_pitch_sum.sum() / total_count) if total_count > 0 else 0.0,
+            "pace": float(len(segment_starts) / duration),
+            "voiced_segments": int(len(segment_starts)),
+            "duration": float(duration),
+            "windows": [
+                {
+                    "start": float(window_starts[i]),
+                    "end": float(window_ends[i]),
+                    "pitch": float(window_pitch[i]),
+                    "pace": float(window_pace[i]),
+                    "voiced_segments": int(window_segments[i]),
+                }
+                for i in range(n_windows)
+            ],
+        }
+
+
+def _add_bincount(totals, index, weights):
+    """Add `weights` into `totals` at `index`, growing `totals` as needed."""
+    counts = np.bincount(index, weights=weights, minlength=len(totals))
+    counts[:len(totals)] += totals
+    return counts
+
+
+def _fold_windows(totals, n_windows):
+    """Resize per-window totals to `n_windows`, folding any overflow into the last window."""
+    folded = np.zeros(n_windows)
+    folded[:min(len(totals), n_windows)] = totals[:n_windows]
+    folded[-1] += totals[n_windows:].sum()
+    return folded
+
+
+def analyze_pitch_pace(y, sr, window_size=10, **kwargs):
+    """
+    Compute pitch and pace for an in-memory signal in one STFT pass.
+
+    Args:
+    - y (np.ndarray): Mono audio samples.
+    - sr (int): Sample rate in Hz.
+    - window_size (float): Length in seconds of each per-window result.
+    - **kwargs: Extra `PitchPaceAnalyzer` options.
+
+    Returns:
+    - dict: See `PitchPaceAnalyzer.finalize()`.
+    """
+    analyzer = PitchPaceAnalyzer(sr, window_size=window_size, **kwargs)
+    analyzer.update(y)
+    return analyzer.finalize()
+
+
+def analyze_audio_stream(file_path, window_size=10, block_seconds=30, **kwargs):
+    """
+    Compute pitch and pace by reading the file in fixed-size blocks.
+
+    Peak memory does not depend on the file length; multichannel audio is
+    downmixed to mono block by block.
+
+    Args:
+    - file_path (str): The path to the audio file.
+    - window_size (float): Length in seconds of each per-window result.
+    - block_seconds (float): Seconds of audio decoded per block.
+    - **kwargs: Extra `PitchPaceAnalyzer` options.
+
+    Returns:
+    - dict: See `PitchPaceAnalyzer.finalize()`.
+    """
+    with sf.SoundFile(file_path) as audio:
+        analyzer = PitchPaceAnalyzer(audio.samplerate, window_size=window_size, **kwargs)
+        blocksize = int(block_seconds * audio.samplerate)
+        for block in audio.blocks(blocksize=blocksize, dtype="float32", always_2d=True):
+            analyzer.update(block.mean(axis=1))
+    return analyzer.finalize()
+
+
+def analyze_audio(file_path, chunk_size=10, stream=False):
     """
     Analyze the pitch and pace of the audio file.
     
     Args:
     - file_path (str): The path to the audio file.
+    - chunk_size (float): Window length in seconds for per-window analysis.
+    - stream (bool): Read the file in blocks with bounded memory instead of
+      decoding it all at once.
 
     Returns:
     - tuple: (float, float)
         - Average pitch in Hz.
         - Pace in words per second.
     """
-   # Load the audio file
-    y, sr = librosa.load(file_path, sr=None)
-<<<<<<< HEAD
-    total_duration = librosa.get_duration(y=y, sr=sr)
+    if stream:
+        analysis = analyze_audio_stream(file_path, window_size=chunk_size)
+    else:
+        # Load the audio file
+        y, sr = librosa.load(file_path, sr=None)
+        analysis = analyze_pitch_pace(y, sr, window_size=chunk_size)
+
+    return analysis["pitch"], analysis["pace"]
+
+
+@functools.lru_cache(maxsize=100)
+def detect_filler_words(transcribed_text):
+    """
+    Identify and count filler words in transcribed text.
     
-    pitches = []
-    paces = []
+    Args:
+    - transcribed_text (str): The transcribed speech or text content.
+
+    Returns:
+    - tuple: (list, int)
+        - List of detected filler words.
+        - Total count of filler words.
+    """
+    filler_patterns = re.compile(r'\b(um|uh|like|you know|so|well|actually|basically|literally|right|okay)\b', re.IGNORECASE)
+    fillers = filler_patterns.findall(transcribed_text)
     
+    filler_count = len(fillers)
+    return fillers, filler_count
+
+
+class DecodedAudio:
+    """
+    Mono float32 PCM decoded once and shared by transcription and analysis.
+
+    Args:
+    - samples (np.ndarray): Mono samples in [-1, 1]; may be a `np.memmap`.
+    - sample_rate (int): Sample rate in Hz.
+    - mmap_path (str, optional): Backing file of a memory-mapped buffer,
+      removed by `close()`.
+    """
+
+    def __init__(self, samples, sample_rate, mmap_path=None):
+        self.samples = samples
+        self.sample_rate = sample_rate
+        self._mmap_path = mmap_path
+
+    @classmethod
+    def from_file(cls, source, mmap=False, block_seconds=30):
+        """
+        Decode an audio file or file-like object to mono.
+
+        Args:
+        - source (str or file-like): Path or open binary stream (e.g. an
+          uploaded file); nothing is written to disk unless `mmap` is set.
+        - mmap (bool): Decode into a temporary memory-mapped file so long
+          recordings are paged in on demand instead of held in RAM.
+        - block_seconds (float): Seconds decoded per block.
+
+        Returns:
+        - DecodedAudio: The decoded audio.
+        """
+        with sf.SoundFile(source) as audio:
+            n_samples = audio.frames
+            mmap_path = None
+            if mmap:
+                with tempfile.NamedTemporaryFile(delete=False, suffix=".pcm") as temp_file:
+                    mmap_path = temp_file.name
+            try:
+                if mmap:
+                    samples = np.memmap(mmap_path, dtype=np.float32, mode="w+", shape=(max(n_samples, 1),))
+                else:
+                    samples = np.empty(n_samples, dtype=np.float32)
+
+                position = 0
+                blocksize = int(block_seconds * audio.samplerate)
+                for block in audio.blocks(blocksize=blocksize, dtype="float32", always_2d=True):
+                    samples[position:position + len(block)] = block.mean(axis=1)
+                    position += len(block)
+            except BaseException:
+                # Corrupt or truncated stream: unmap and remove the temporary file
+                samples = None
+                if mmap_path:
+                    os.remove(mmap_path)
+                raise
+
+            return cls(samples[:position], audio.samplerate, mmap_path)
+
+    @property
+    def duration(self):
+        """Length in seconds."""
+        return len(self.samples) / self.sample_rate
+
+    def blocks(self, block_seconds=30):
+        """
+        Yield consecutive sample blocks, so memory-mapped audio is read in pieces.
+
+        Args:
+        - block_seconds (float): Seconds per block.
+        """
+        blocksize = int(block_seconds * self.sample_rate)
+        for start in range(0, len(self.samples), blocksize):
+            yield self.samples[start:start + blocksize]
+
+    def to_audio_data(self, start=0.0, end=None):
+        """
+        Convert a time range to 16-bit PCM for the speech recognizer.
+
+        Args:
+        - start (float): Start time in seconds.
+        - end (float, optional): End time in seconds; defaults to the end.
+
+        Returns:
+        - sr.AudioData: Audio for `recognize_*` calls.
+        """
+        first = int(start * self.sample_rate)
+        last = len(self.samples) if end is None else int(end * self.sample_rate)
+        return self.ranges_to_audio_data([(first, last)])
+
+    def ranges_to_audio_data(self, ranges):
+        """
+        Join several sample ranges, in order, into one recognizer request.
+
+        Args:
+        - ranges (list): (start, end) sample indices, end exclusive.
+
+        Returns:
+        - sr.AudioData: The concatenated audio.
+        """
+        parts = [
+            (np.clip(self.samples[start:end], -1.0, 1.0) * 32767).astype("<i2")
+            for start, end in ranges
+        ]
+        pcm = np.concatenate(parts) if parts else np.zeros(0, dtype="<i2")
+        return sr.AudioData(pcm.tobytes(), self.sample_rate, 2)
+
+    def close(self):
+        """Release the buffer and remove the memory-mapped file, if any."""
+        self.samples = np.zeros(0, dtype=np.float32)
+        if self._mmap_path and os.path.exists(self._mmap_path):
+            os.remove(self._mmap_path)
+        self._mmap_path = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def analyze_decoded_audio(audio, window_size=10, segments=None):
+    """
+    Compute pitch and pace from already decoded audio, block by block.
+
+    Args:
+    - audio (DecodedAudio): The decoded audio.
+    - window_size (float): Length in seconds of each per-window result.
+    - segments (list, optional): Speech segments from `detect_speech_segments()`.
+      When given, pace is measured over speaking time only, so pauses
+      between segments don't lower it.
+
+    Returns:
+    - dict: See `PitchPaceAnalyzer.finalize()`; with `segments` also
+      "speech_duration" (float), the seconds covered by the segments.
+    """
+    analyzer = PitchPaceAnalyzer(audio.sample_rate, window_size=window_size)
+    for block in audio.blocks():
+        analyzer.update(block)
+    analysis = analyzer.finalize()
+
+    if segments is not None:
+        speech_duration = sum(end - start for start, end in segments)
+        analysis["speech_duration"] = speech_duration
+        analysis["pace"] = analysis["voiced_segments"] / speech_duration if speech_duration else 0.0
+    return analysis
+
+
+def _frame_energy_db(audio, frame_length, block_seconds=30):
+    """Mean energy in dB of consecutive `frame_length`-sample frames, read block by block."""
+    blocksize = max(1, int(block_seconds * audio.sample_rate) // frame_length) * frame_length
+    energies = []
+    for start in range(0, len(audio.samples), blocksize):
+        block = np.asarray(audio.samples[start:start + blocksize], dtype=np.float32)
+        n_frames = -(-len(block) // frame_length)
+        block = np.pad(block, (0, n_frames * frame_length - len(block)))
+        energies.append(np.mean(block.reshape(n_frames, frame_length) ** 2, axis=1))
+    if not energies:
+        return np.zeros(0)
+    return 10 * np.log10(np.concatenate(energies) + 1e-10)
+
+
+def detect_speech_segments(audio, frame_ms=30, margin_db=None, min_silence=None, min_speech=0.2,
+                           padding=0.2, block_seconds=30):
+    """
+    Find the voiced parts of a recording with an energy-based VAD.
+
+    Frame energies are computed block by block (memory-mapped audio is read
+    in pieces). The noise floor is the 10th percentile of frame energy, so
+    the threshold adapts to the recording's background level, however
+    quiet the recording. Recordings that never rise `margin_db` above their
+    noise floor (or whose loudest frame is below the optional
+    `VAD_FLOOR_DB`) have no speech.
+
+    Args:
+    - audio (DecodedAudio): The decoded audio.
+    - frame_ms (float): Analysis frame length in milliseconds.
+    - margin_db (float, optional): Energy above the noise floor for a voiced
+      frame; defaults to `VAD_MARGIN_DB`.
+    - min_silence (float, optional): Shorter pauses are kept inside a
+      segment; defaults to `VAD_MIN_SILENCE`.
+    - min_speech (float): Shorter voiced bursts (clicks, bumps) are dropped.
+    - padding (float): Seconds of context kept on each side of a segment.
+    - block_seconds (float): Seconds of audio read per block.
+
+    Returns:
+    - list: (start, end) times in seconds of each speech segment, in order.
+    """
+    margin_db = VAD_MARGIN_DB if margin_db is None else margin_db
+    min_silence = VAD_MIN_SILENCE if min_silence is None else min_silence
+    frame_length = max(1, int(audio.sample_rate * frame_ms / 1000))
+    frame_seconds = frame_length / audio.sample_rate
+
+    db = _frame_energy_db(audio, frame_length, block_seconds)
+    if len(db) == 0:
+        return []
+    peak = db.max()
+    noise_floor = np.percentile(db, 10)
+    # A silent take, or steady noise with nothing standing out of it, has no speech
+    if peak < VAD_FLOOR_DB or peak - noise_floor < margin_db:
+        return []
+    # Never call frames more than 40 dB below the loudest one speech
+    threshold = max(noise_floor + margin_db, peak - 40, VAD_FLOOR_DB)
+    voiced = np.concatenate(([False], db > threshold, [False]))
+    edges = np.flatnonzero(voiced[1:] != voiced[:-1])
+
+    segments = []
+    for first, last in zip(edges[::2], edges[1::2]):
+        start, end = first * frame_seconds, last * frame_seconds
+        if segments and start - segments[-1][1] < min_silence:
+            segments[-1][1] = end
+        else:
+            segments.append([start, end])
+
+    duration = audio.duration
+    return [
+        (max(0.0, start - padding), min(duration, end + padding))
+        for start, end in segments
+        if end - start >= min_speech
+    ]
+
+
+def voiced_audio_data(audio_data):
+    """
+    Trim leading and trailing silence from a recording before recognition.
+
+    Args:
+    - audio_data (sr.AudioData): The recording.
+
+    Returns:
+    - sr.AudioData or None: The audio from the first to the last speech
+      segment, or None if it contains no speech.
+    """
+    decoded = DecodedAudio.from_file(io.BytesIO(audio_data.get_wav_data()))
+    segments = detect_speech_segments(decoded)
+    if not segments:
+        return None
+    return decoded.to_audio_data(segments[0][0], segments[-1][1])
+
+
+def recognize_google_chunk(audio_data, language="en-US"):
+    """
+    Transcribe one chunk with the Google Web Speech API.
+
+    Args:
+    - audio_data (sr.AudioData): The audio chunk.
+    - language (str): Recognition language.
+
+    Returns:
+    - str: The transcribed text.
+
+    Exceptions:
+    - sr.UnknownValueError: Raised if the speech cannot be understood.
+    - sr.RequestError: Raised if the service is unavailable.
+    """
+    recognizer = get_resource("recognizer", sr.Recognizer)
+    return recognizer.recognize_google(audio_data, language=language)
+
+
+class STTBackend:
+    """
+    A speech-to-text engine.
+
+    Subclasses set `name` and implement `transcribe()`. Heavy models are
+    loaded once by `load()` and shared by every session, so `transcribe()`
+    must be safe to call from several threads at once.
+    """
+
+    name = None
+
+    def available(self):
+        """Return True if the engine and its model are installed on this machine."""
+        return True
+
+    def load(self):
+        """Load the model. Called once per process by `get_stt_backend()`."""
+
+    def transcribe(self, audio_data, language="en-US"):
+        """
+        Transcribe one utterance or chunk.
+
+        Args:
+        - audio_data (sr.AudioData): The audio.
+        - language (str): Recognition language.
+
+        Returns:
+        - str: The transcribed text.
+
+        Exceptions:
+        - sr.UnknownValueError: Raised if no speech was recognized.
+        - sr.RequestError: Raised if the engine failed.
+        """
+        raise NotImplementedError
+
+
+class GoogleSTTBackend(STTBackend):
+    """Google Web Speech API. Needs the network and is rate limited."""
+
+    name = "google"
+
+    def transcribe(self, audio_data, language="en-US"):
+        return recognize_google_chunk(audio_data, language)
+
+
+class VoskBackend(STTBackend):
+    """Offline Kaldi-based Vosk engine; model directory from TALKIEE_VOSK_MODEL."""
+
+    name = "vosk"
+    sample_rate = 16000
+
+    def __init__(self):
+        self.model_path = os.getenv("TALKIEE_VOSK_MODEL")
+        self.model = None
+
+    def available(self):
+        return (
+            importlib.util.find_spec("vosk") is not None
+            and bool(self.model_path) and os.path.isdir(self.model_path)
+        )
+
+    def load(self):
+        import vosk
+
+        vosk.SetLogLevel(-1)
+        self.model = vosk.Model(self.model_path)
+
+    def transcribe(self, audio_data, language="en-US"):
+        import vosk
+
+        # The model is shared; each request gets its own lightweight recognizer
+        recognizer = vosk.KaldiRecognizer(self.model, self.sample_rate)
+        try:
+            recognizer.AcceptWaveform(
+                audio_data.get_raw_data(convert_rate=self.sample_rate, convert_width=2)
+            )
+            text = json.loads(recognizer.FinalResult()).get("text", "")
+        except Exception as e:
+            raise sr.RequestError(f"Vosk failed: {e}")
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+
+class WhisperBackend(STTBackend):
+    """
+    Offline Whisper engine via faster-whisper (CTranslate2, int8-quantized on CPU).
+
+    TALKIEE_WHISPER_MODEL is a model size ("tiny.en", "base.en", ...) or a
+    local model directory.
+    """
+
+    name = "whisper"
+    sample_rate = 16000
+
+    def __init__(self):
+        self.model_name = os.getenv("TALKIEE_WHISPER_MODEL", "base.en")
+        self.model = None
+
+    def available(self):
+        return importlib.util.find_spec("faster_whisper") is not None
+
+    def load(self):
+        from faster_whisper import WhisperModel
+
+        self.model = WhisperModel(self.model_name, device="cpu", compute_type="int8")
+
+    def transcribe(self, audio_data, language="en-US"):
+        pcm = audio_data.get_raw_data(convert_rate=self.sample_rate, convert_width=2)
+        samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+        try:
+            segments, _ = self.model.transcribe(
+                samples, language=language.split("-")[0], beam_size=1, vad_filter=True
+            )
+            text = " ".join(segment.text.strip() for segment in segments).strip()
+        except Exception as e:
+            raise sr.RequestError(f"Whisper failed: {e}")
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+
+STT_BACKENDS = {
+    "google": GoogleSTTBackend,
+    "vosk": VoskBackend,
+    "whisper": WhisperBackend,
+}
+
+# Selected backend; engines that are missing or fail to load fall back to Google
+STT_ENGINE = os.getenv("TALKIEE_STT_ENGINE", "google")
+
+def get_stt_backend(name=None):
+    """
+    Get the shared, loaded instance of an STT backend.
+
+    Args:
+    - name (str, optional): Key in `STT_BACKENDS`; defaults to `STT_ENGINE`.
+
+    Returns:
+    - STTBackend: The backend, or the Google backend if `name` cannot be used here.
+
+    Raises:
+    - ValueError: If `name` is not a known backend.
+    """
+    name = name or STT_ENGINE
+    if name not in STT_BACKENDS:
+        raise ValueError(f"Unknown STT engine '{name}'. Choose from: {', '.join(STT_BACKENDS)}")
+    return get_resource(f"stt:{name}", functools.partial(_load_stt_backend, name))
+
+
+def _load_stt_backend(name):
+    """Create and load an STT backend, falling back to Google if it cannot be used."""
+    backend = STT_BACKENDS[name]()
+    try:
+        if not backend.available():
+            raise RuntimeError("engine or model not installed")
+        backend.load()
+    except Exception as e:
+        print(f"STT engine '{name}' is not available ({e}). Falling back to Google.")
+        return get_stt_backend("google")
+    return backend
+
+
+def transcribe_audio(audio_data, language="en-US"):
+    """
+    Transcribe audio with the configured STT backend (`STT_ENGINE`).
+
+    Args:
+    - audio_data (sr.AudioData): The audio.
+    - language (str): Recognition language.
+
+    Returns:
+    - str: The transcribed text.
+
+    Exceptions:
+    - sr.UnknownValueError: Raised if the speech cannot be understood.
+    - sr.RequestError: Raised if the engine or service failed.
+    """
+    return get_stt_backend().transcribe(audio_data, language)
+
+
+def _transcribe_chunk(recognize, audio, ranges, max_retries):
+    """
+    Transcribe one chunk, retrying service errors with backoff.
+
+    Args:
+    - recognize (callable): STT backend, `recognize(sr.AudioData) -> str`.
+    - audio (DecodedAudio): The decoded audio.
+    - ranges (list): (start, end) sample ranges sent together as the chunk.
+    - max_retries (int): Attempts before giving up on a service error;
+      at least one attempt is always made.
+
+    Returns:
+    - str: The chunk text, or an "[Unclear Audio]"/"[Error: ...]" marker.
+    """
+    audio_data = audio.ranges_to_audio_data(ranges)
+    attempts = max(1, max_retries)
+    for attempt in range(attempts):
+        try:
+            return recognize(audio_data)
+        except sr.UnknownValueError:
+            return "[Unclear Audio]"
+        except sr.RequestError as e:
+            if attempt == attempts - 1:
+                return f"[Error: {e}]"
+            time.sleep(0.5 * 2 ** attempt)
+
+
+def plan_transcription_chunks(audio, max_duration=30, segments=None, frame_ms=30, search=0.5):
+    """
+    Plan transcription chunks that end at pauses rather than at fixed offsets.
+
+    Speech spans longer than `max_duration` are cut into pieces of about
+    equal length. Each cut is placed in the latest pause (the quietest 0.1 s,
+    within 3 dB) near its ideal position, so words are not split across
+    requests.
+    Consecutive pieces are then packed into chunks of at most `max_duration`
+    seconds of audio. The plan only holds indices into the one decoded
+    buffer, so chunks can be handed to any number of workers.
+
+    Args:
+    - audio (DecodedAudio): The decoded audio.
+    - max_duration (float): Maximum seconds of audio per chunk.
+    - segments (list, optional): Speech segments from `detect_speech_segments()`;
+      by default the whole recording is one span.
+    - frame_ms (float): Resolution of the pause search in milliseconds.
+    - search (float): Fraction of a piece length searched on each side of an ideal cut.
+
+    Returns:
+    - list: Chunks in order, each a list of (start, end) sample ranges.
+    """
+    rate = audio.sample_rate
+    max_samples = int(max_duration * rate)
+    frame_length = max(1, int(rate * frame_ms / 1000))
+    if segments is None:
+        spans = [(0, len(audio.samples))]
+    else:
+        spans = [(int(start * rate), min(int(end * rate), len(audio.samples))) for start, end in segments]
+
+    db = None
+    pieces = []
+    for start, end in spans:
+        n_pieces = -(-(end - start) // max_samples)
+        if n_pieces > 1 and db is None:
+            db = _frame_energy_db(audio, frame_length)
+            # Smooth over ~0.1 s so a cut lands in a pause, not between two pitch periods
+            width = max(1, int(0.1 * rate / frame_length))
+            db = np.convolve(db, np.ones(width) / width, mode="same")
+        while n_pieces > 1:
+            target = (end - start) / n_pieces
+            lo = start + int(target * (1 - search))
+            hi = min(start + int(target * (1 + search)), start + max_samples)
+            first, last = -(-lo // frame_length), hi // frame_length
+            if last > first:
+                # Middle of the last stretch within 3 dB of the quietest point: keeps pieces long
+                quiet = np.flatnonzero(db[first:last] <= db[first:last].min() + 3)
+                breaks = np.flatnonzero(np.diff(quiet) > 1)
+                run_start = quiet[breaks[-1] + 1] if len(breaks) else quiet[0]
+                cut = (first + int(run_start + quiet[-1]) // 2) * frame_length
+            else:
+                cut = start + int(target)
+            pieces.append((start, cut))
+            start = cut
+            n_pieces = -(-(end - start) // max_samples)
+        if end > start:
+            pieces.append((start, end))
+
+    chunks, current, size = [], [], 0
+    for start, end in pieces:
+        if current and size + end - start > max_samples:
+            chunks.append(current)
+            current, size = [], 0
+        current.append((start, end))
+        size += end - start
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def analyze_uploaded_audio(audio, status_callback=None, chunk_duration=30, recognize=None,
+                           max_workers=STT_MAX_WORKERS, max_retries=3, vad=None):
+    """
+    Analyze pitch, pace, and transcribe the uploaded audio file.
+
+    The audio is decoded once; transcription chunks and the pitch/pace
+    analysis both read the same buffer. With VAD, speech segments are found
+    once: only voiced audio is transcribed and pace is measured over
+    speaking time. Chunks are planned up front with cuts at pauses
+    (`plan_transcription_chunks()`), transcribed by a bounded thread pool,
+    then reassembled in order.
+    
+    Args:
+    - audio (DecodedAudio or str): Decoded audio, or a path to decode.
+    - status_callback (function, optional): Callback function to update status messages during processing.
+      Called from the calling thread as chunks complete.
+    - chunk_duration (int): Maximum seconds of audio per transcription request.
+    - recognize (callable, optional): STT backend, `recognize(sr.AudioData) -> str`,
+      raising `sr.UnknownValueError`/`sr.RequestError`. Defaults to `transcribe_audio`.
+    - max_workers (int): Maximum concurrent transcription requests.
+    - max_retries (int): Attempts per chunk on service errors.
+    - vad (bool, optional): Skip silence with `detect_speech_segments()`;
+      defaults to `VAD_ENABLED`.
+
+    Returns:
+    - tuple: (str, float, float)
+        - Transcribed text from the audio.
+        - Average pitch in Hz.
+        - Speaking pace in words per second.
+
+    Exceptions:
+    - FileNotFoundError: Raised if the file path is invalid.
+    - Exception: Catches unexpected errors.
+    """
+    if not isinstance(audio, DecodedAudio):
+        with DecodedAudio.from_file(audio) as decoded:
+            return analyze_uploaded_audio(
+                decoded, status_callback, chunk_duration, recognize, max_workers, max_retries, vad
+            )
+
+    recognize = recognize or transcribe_audio
+    vad = VAD_ENABLED if vad is None else vad
+
+    if status_callback:
+        status_callback("Starting transcription...")
+
+    segments = detect_speech_segments(audio) if vad else None
+    chunks = plan_transcription_chunks(audio, chunk_duration, segments)
+    chunk_seconds = [sum(end - start for start, end in chunk) / audio.sample_rate for chunk in chunks]
+    audio_length = sum(chunk_seconds)
+    texts = [None] * len(chunks)
+    processed_seconds = 0
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            pool.submit(_transcribe_chunk, recognize, audio, ranges, max_retries): index
+            for index, ranges in enumerate(chunks)
+        }
+        for future in concurrent.futures.as_completed(futures):
+            index = futures[future]
+            texts[index] = future.result()
+
+            processed_seconds += chunk_seconds[index]
+            if status_callback:
+                status_callback(f"Processed {processed_seconds:.0f} of {audio_length:.0f} seconds of speech")
+
+    full_transcription = " ".join(texts)
+    
+    if status_callback:
+        status_callback("Analyzing audio characteristics...")
+
+    # Analyze pitch and pace from the same decoded buffer
+    analysis = analyze_decoded_audio(audio, segments=segments)
+
+    return full_transcription.strip(), analysis["pitch"], analysis["pace"]
+
+
+# -------------------------
+# 3. DOCUMENT PROCESSING
+# -------------------------
+
+# Extracted text cache keyed by the SHA-256 of the uploaded bytes, so the same
+# deck uploaded again (or seen on a Streamlit rerun) is parsed only once. The
+# memory tier is bounded by total extracted characters; the disk tier by bytes.
+DOC_CACHE_MAX_CHARS = int(os.getenv("TALKIEE_DOC_CACHE_CHARS", 20_000_000))
+DOC_CACHE_DIR = os.getenv(
+    "TALKIEE_DOC_CACHE_DIR", os.path.join(tempfile.gettempdir(), "talkiee_doc_cache")
+)
+DOC_CACHE_MAX_BYTES = int(os.getenv("TALKIEE_DOC_CACHE_MAX_BYTES", 200 * 1024 * 1024))
+
+# PDFs with at least DOC_PARALLEL_MIN_PAGES pages are split into one page range
+# per worker and parsed on a process pool (PyPDF2 is pure Python, so threads
+# don't help). Defaults to the CPUs this process may run on; with one, PDFs
+# are parsed in-process.
+DOC_MAX_WORKERS = int(os.getenv(
+    "TALKIEE_DOC_WORKERS",
+    len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1,
+))
+DOC_PARALLEL_MIN_PAGES = int(os.getenv("TALKIEE_DOC_PARALLEL_PAGES", 50))
+
+_DOC_CACHE = collections.OrderedDict()
+_DOC_CACHE_LOCK = threading.Lock()
+_DOC_CACHE_STATS = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "chars": 0,
+                    "parse_seconds": 0.0}
+
+
+def _read_upload(uploaded_file):
+    """Return the bytes of an uploaded file or path without moving its read position."""
+    if isinstance(uploaded_file, bytes):
+        return uploaded_file
+    if isinstance(uploaded_file, (str, os.PathLike)):
+        with open(uploaded_file, "rb") as f:
+            return f.read()
+    if hasattr(uploaded_file, "getvalue"):
+        return uploaded_file.getvalue()
+    position = uploaded_file.tell()
+    uploaded_file.seek(0)
+    data = uploaded_file.read()
+    uploaded_file.seek(position)
+    return data
+
+
+def _doc_cache_get(key):
+    """Look up extracted text in memory, then on disk. Returns the text or None."""
+    with _DOC_CACHE_LOCK:
+        text = _DOC_CACHE.get(key)
+        if text is not None:
+            _DOC_CACHE.move_to_end(key)
+            _DOC_CACHE_STATS["hits"] += 1
+            return text
+
+    path = os.path.join(DOC_CACHE_DIR, f"{key}.txt")
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+        # Touch the file so eviction treats it as recently used
+        os.utime(path)
+    except OSError:
+        text = None
+
+    with _DOC_CACHE_LOCK:
+        if text is None:
+            _DOC_CACHE_STATS["misses"] += 1
+            return None
+        _doc_cache_remember(key, text)
+        _DOC_CACHE_STATS["hits"] += 1
+        _DOC_CACHE_STATS["disk_hits"] += 1
+    return text
+
+
+def _doc_cache_remember(key, text):
+    """Insert into the in-memory LRU; caller holds `_DOC_CACHE_LOCK`."""
+    if len(text) > DOC_CACHE_MAX_CHARS:
+        return
+    if key in _DOC_CACHE:
+        _DOC_CACHE_STATS["chars"] -= len(_DOC_CACHE[key])
+    _DOC_CACHE[key] = text
+    _DOC_CACHE.move_to_end(key)
+    _DOC_CACHE_STATS["chars"] += len(text)
+    while _DOC_CACHE_STATS["chars"] > DOC_CACHE_MAX_CHARS:
+        _, evicted = _DOC_CACHE.popitem(last=False)
+        _DOC_CACHE_STATS["chars"] -= len(evicted)
+        _DOC_CACHE_STATS["evictions"] += 1
+
+
+def _doc_cache_put(key, text):
+    """Store extracted text in both tiers."""
+    with _DOC_CACHE_LOCK:
+        _doc_cache_remember(key, text)
+
+    try:
+        os.makedirs(DOC_CACHE_DIR, exist_ok=True)
+        # Write to a scratch file and rename so readers never see a partial entry
+        with tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", delete=False, suffix=".part", dir=DOC_CACHE_DIR
+        ) as temp_file:
+            temp_file.write(text)
+        os.replace(temp_file.name, os.path.join(DOC_CACHE_DIR, f"{key}.txt"))
+        evicted = _evict_lru_files(DOC_CACHE_DIR, DOC_CACHE_MAX_BYTES)
+    except OSError as e:
+        print(f"Document cache write failed: {e}")
+        return
+    with _DOC_CACHE_LOCK:
+        _DOC_CACHE_STATS["evictions"] += evicted
+
+
+def get_doc_cache_stats():
+    """
+    Get document extraction cache counters for this process.
+
+    Returns:
+    - dict: "hits", "disk_hits", "misses", "evictions", "hit_rate" (0-1),
+      "chars" (extracted text held in memory) and "parse_seconds" (time spent
+      parsing documents on misses).
+    """
+    with _DOC_CACHE_LOCK:
+        stats = dict(_DOC_CACHE_STATS)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+    return stats
+
+
+def extract_text_from_file(uploaded_file, file_extension, use_cache=True):
+    """
+    Extract text from PDF or DOCX file.
+
+    Args:
+    - uploaded_file (File object or str): The uploaded PDF or DOCX file, or its path.
+    - file_extension (str): The file extension ('pdf' or 'docx').
+    - use_cache (bool): Serve and store the text in the document cache,
+      keyed by the content hash of the file.
+
+    Returns:
+    - str: Extracted text from the file.
+
+    Exceptions:
+    - ValueError: Raised if the file extension is not supported.
+    - Exception: Catches unexpected errors.
+    """
+    try:
+        return "".join(stream_text_from_file(uploaded_file, file_extension, use_cache))
+
+    except ValueError as ve:
+        print(f"ValueError: {ve}")
+        return 
+
+    except Exception as e:
+        print(f"Unexpected error: {e}")
+        return 
+
+
+def stream_text_from_file(uploaded_file, file_extension, use_cache=True):
+    """
+    Stream the text of a PDF or DOCX file through the document cache.
+
+    A cached document is yielded in one piece; otherwise the pages are
+    yielded as `iter_document_pages` extracts them, and the text is stored
+    once the whole file has been read.
+
+    Args:
+    - uploaded_file (File object or str): The uploaded PDF or DOCX file, or its path.
+    - file_extension (str): The file extension ('pdf' or 'docx').
+    - use_cache (bool): Serve and store the text in the document cache,
+      keyed by the content hash of the file.
+
+    Yields:
+    - str: The next piece of text; `"".join()` of the result is the full text.
+
+    Exceptions:
+    - ValueError: Raised if the file extension is not supported.
+    """
+    if file_extension not in ("pdf", "docx"):
+        raise ValueError("Unsupported file format. Only PDF and DOCX are supported.")
+
+    data = _read_upload(uploaded_file)
+    key = hashlib.sha256(file_extension.encode("utf-8") + b"\0" + data).hexdigest()
+    if use_cache:
+        text = _doc_cache_get(key)
+        if text is not None:
+            yield text
+            return
+
+    source = uploaded_file if isinstance(uploaded_file, (str, os.PathLike)) else data
+    reader = iter_document_pages(source, file_extension)
+    pages = []
+    try:
+        while True:
+            # Only the extraction counts as parse time, not the consumer's work between pages
+            start = time.perf_counter()
+            page = next(reader, None)
+            with _DOC_CACHE_LOCK:
+                _DOC_CACHE_STATS["parse_seconds"] += time.perf_counter() - start
+            if page is None:
+                break
+            pages.append(page)
+            yield page
+    finally:
+        # Cancels the remaining page ranges if the caller stops reading early
+        reader.close()
+    if use_cache:
+        _doc_cache_put(key, "".join(pages))
+
+
+def _parse_document(data, file_extension):
+    """Parse the text out of PDF or DOCX bytes, joined once at the end."""
+    return "".join(iter_document_pages(data, file_extension))
+
+
+def get_doc_pool():
+    """Get the shared process pool for parsing large PDFs."""
+    # Spawned, not forked: the parent runs the LLM loop and worker threads
+    return get_resource("doc_pool", lambda: concurrent.futures.ProcessPoolExecutor(
+        max_workers=DOC_MAX_WORKERS, mp_context=multiprocessing.get_context("spawn")
+    ))
+
+
+def _extract_pdf_pages(path, start, stop):
+    """Process pool task: extract the text of pages [start, stop) of the PDF at `path`."""
+    import PyPDF2
+
+    reader = PyPDF2.PdfReader(path)
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def iter_document_pages(uploaded_file, file_extension):
+    """
+    Stream the text of a PDF or DOCX file, in order, as it is extracted.
+
+    PDFs yield one string per page; large PDFs are split into one page range
+    per worker, parsed in parallel on `get_doc_pool()`. DOCX files yield one string per
+    paragraph, newline-terminated. `"".join()` of the result is the full text.
+
+    Args:
+    - uploaded_file (File object, bytes or str): The document, its bytes or its path.
+    - file_extension (str): The file extension ('pdf' or 'docx').
+
+    Yields:
+    - str: Text of the next page or paragraph.
+
+    Exceptions:
+    - ValueError: Raised if the file extension is not supported.
+    """
+    data = _read_upload(uploaded_file)
+
+    # Imported here: only the presentation tab reads documents
+    if file_extension == "pdf":
+        import PyPDF2
+
+        reader = PyPDF2.PdfReader(io.BytesIO(data))
+        page_count = len(reader.pages)
+        if DOC_MAX_WORKERS < 2 or page_count < DOC_PARALLEL_MIN_PAGES:
+            for page in reader.pages:
+                yield page.extract_text() or ""
+            return
+
+        # One page range per worker; workers read the file from disk rather
+        # than receiving the document's bytes with every task
+        if isinstance(uploaded_file, (str, os.PathLike)):
+            path, temp_path = uploaded_file, None
+        else:
+            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_file:
+                temp_file.write(data)
+            path = temp_path = temp_file.name
+        batch = -(-page_count // DOC_MAX_WORKERS)
+        pool = get_doc_pool()
+        futures = [
+            pool.submit(_extract_pdf_pages, path, start, min(start + batch, page_count))
+            for start in range(0, page_count, batch)
+        ]
+        try:
+            for future in futures:
+                yield from future.result()
+        finally:
+            # Stop unstarted ranges if the caller stops reading early
+            for future in futures:
+                future.cancel()
+            if temp_path is not None:
+                with contextlib.suppress(OSError):
+                    os.remove(temp_path)
+
+    elif file_extension == "docx":
+        import docx
+
+        doc = docx.Document(io.BytesIO(data))
+        for para in doc.paragraphs:
+            yield para.text + "\n"
+
+    else:
+        raise ValueError("Unsupported file format. Only PDF and DOCX are supported.")
+
+    
+# -------------------------
+# 4. AUDIO OUTPUT
+# -------------------------
+
+
+class TTSBackend:
+    """
+    A speech synthesis engine.
+
+    Subclasses set `name`, `suffix` (audio file extension) and `mime`, and
+    implement `synthesize()`. Backends are shared between sessions, so
+    `synthesize()` must be safe to call from several threads at once.
+    """
+
+    name = None
+    suffix = ".wav"
+    mime = "audio/wav"
+
+    def available(self):
+        """Return True if the engine can be used on this machine."""
+        return True
+
+    def cache_key(self):
+        """Identify the engine and voice in TTS cache keys."""
+        return self.name
+
+    def synthesize(self, text, lang, path):
+        """
+        Synthesize `text` and write the audio to `path`.
+
+        Args:
+        - text (str): The text to be spoken.
+        - lang (str): Language code for the speech.
+        - path (str): Output file path.
+        """
+        raise NotImplementedError
+
+
+class GTTSBackend(TTSBackend):
+    """Google Translate TTS. Needs the network; one HTTP round-trip per sentence batch."""
+
+    name = "gtts"
+    suffix = ".mp3"
+    mime = "audio/mp3"
+
+    def synthesize(self, text, lang, path):
+        from gtts import gTTS
+
+        gTTS(text=text, lang=lang).save(path)
+
+
+class EspeakBackend(TTSBackend):
+    """Offline eSpeak NG engine, run as a subprocess per request."""
+
+    name = "espeak"
+
+    def __init__(self):
+        self.binary = shutil.which("espeak-ng") or shutil.which("espeak")
+
+    def available(self):
+        return self.binary is not None
+
+    def synthesize(self, text, lang, path):
+        subprocess.run(
+            [self.binary, "-v", lang, "-w", path, "--stdin"],
+            input=text.encode("utf-8"), capture_output=True, check=True,
+        )
+
+
+class PiperBackend(TTSBackend):
+    """
+    Offline Piper neural engine, run as a subprocess per request.
+
+    The voice model is given by TALKIEE_PIPER_MODEL and determines the
+    language, so `lang` is ignored.
+    """
+
+    name = "piper"
+
+    def __init__(self):
+        self.binary = shutil.which("piper")
+        self.model = os.getenv("TALKIEE_PIPER_MODEL")
+
+    def available(self):
+        return bool(self.binary and self.model and os.path.exists(self.model))
+
+    def cache_key(self):
+        return f"{self.name}:{os.path.basename(self.model or '')}"
+
+    def synthesize(self, text, lang, path):
+        subprocess.run(
+            [self.binary, "--model", self.model, "--output_file", path],
+            input=text.encode("utf-8"), capture_output=True, check=True,
+        )
+
+
+TTS_BACKENDS = {
+    "gtts": GTTSBackend,
+    "espeak": EspeakBackend,
+    "piper": PiperBackend,
+}
+
+# Selected backend; unavailable offline engines fall back to gTTS
+TTS_ENGINE = os.getenv("TALKIEE_TTS_ENGINE", "gtts")
+
+def get_tts_backend(name=None):
+    """
+    Get the shared instance of a TTS backend.
+
+    Args:
+    - name (str, optional): Key in `TTS_BACKENDS`; defaults to `TTS_ENGINE`.
+
+    Returns:
+    - TTSBackend: The backend, or the gTTS backend if `name` is not available here.
+
+    Raises:
+    - ValueError: If `name` is not a known backend.
+    """
+    name = name or TTS_ENGINE
+    if name not in TTS_BACKENDS:
+        raise ValueError(f"Unknown TTS engine '{name}'. Choose from: {', '.join(TTS_BACKENDS)}")
+    return get_resource(f"tts:{name}", functools.partial(_load_tts_backend, name))
+
+
+def _load_tts_backend(name):
+    """Create a TTS backend, falling back to gTTS if it is not available."""
+    backend = TTS_BACKENDS[name]()
+    if not backend.available():
+        print(f"TTS engine '{name}' is not available. Falling back to gTTS.")
+        return get_tts_backend("gtts")
+    return backend
+
+
+def get_tts_format(engine=None):
+    """
+    Get the MIME type of the audio produced by a TTS backend.
+
+    Args:
+    - engine (str, optional): Backend name; defaults to `TTS_ENGINE`.
+
+    Returns:
+    - str: e.g. "audio/mp3" or "audio/wav".
+    """
+    return get_tts_backend(engine).mime
+
+
+# Content-addressed TTS cache: identical (engine, lang, text) requests map to
+# one file on disk, so replaying a question or passage is a file lookup.
+TTS_CACHE_DIR = os.getenv(
+    "TALKIEE_TTS_CACHE_DIR", os.path.join(tempfile.gettempdir(), "talkiee_tts_cache")
+)
+TTS_CACHE_MAX_BYTES = int(os.getenv("TALKIEE_TTS_CACHE_MAX_BYTES", 200 * 1024 * 1024))
+# Syntheses running at once across all sessions
+TTS_MAX_WORKERS = int(os.getenv("TALKIEE_TTS_WORKERS", 4))
+
+_TTS_CACHE_LOCK = threading.Lock()
+_TTS_CACHE_STATS = {"hits": 0, "misses": 0, "evictions": 0, "coalesced": 0}
+# Syntheses in progress by cache path; identical requests share the future
+_TTS_IN_FLIGHT = {}
+
+
+def _tts_cache_path(text, lang, backend):
+    """
+    Build the cache file path for a synthesis request.
+
+    Args:
+    - text (str): The text to be spoken.
+    - lang (str): Language code passed to the engine.
+    - backend (TTSBackend): The TTS engine.
+
+    Returns:
+    - str: Path of the audio file inside the cache directory.
+    """
+    key = hashlib.sha256(json.dumps([backend.cache_key(), lang, text]).encode("utf-8")).hexdigest()
+    return os.path.join(TTS_CACHE_DIR, f"{key}{backend.suffix}")
 
-    for start in range(0, int(total_duration), chunk_size):
-        end = min(start + chunk_size, total_duration)
-        chunk_y = y[int(start * sr):int(end * sr)]
-        
-        chunk_pitches, magnitudes = librosa.piptrack(y=chunk_y, sr=sr)
-        pitch_values = chunk_pitches[chunk_pitches > 0]
-        avg_pitch = np.mean(pitch_values) if len(pitch_values) > 0 else 0
 
-        duration = librosa.get_duration(y=chunk_y, sr=sr)
-        
-        words = len(librosa.effects.split(chunk_y))  
-        pace = words / duration if duration > 0 else 0
-        pitches.append(avg_pitch)
-        paces.append(pace)
-
-    # Average results from all chunks
-    final_pitch = float(np.mean(pitches) if len(pitches) > 0 else 0)
-    final_pace =float(np.mean(paces) if len(paces) > 0 else 0)
-    
-    return final_pitch, final_pace
-=======
-    pitches, magnitudes = librosa.piptrack(y=y, sr=sr)
-    pitch_values = pitches[pitches > 0]
-    avg_pitch = np.mean(pitch_values) if len(pitch_values) > 0 else 0
-    duration = librosa.get_duration(y=y, sr=sr)
-    words = len(librosa.effects.split(y))
-    pace = words / duration if duration > 0 else 0
-
-    return avg_pitch, pace
->>>>>>> refactor1
+def _evict_tts_cache():
+    """Delete least recently used cache files until the cache fits its size cap."""
+    _TTS_CACHE_STATS["evictions"] += _evict_lru_files(TTS_CACHE_DIR, TTS_CACHE_MAX_BYTES)
 
-@functools.lru_cache(maxsize=100)
-def detect_filler_words(transcribed_text):
+
+def get_tts_cache_stats():
     """
-    Identify and count filler words in transcribed text.
-    
-    Args:
-    - transcribed_text (str): The transcribed speech or text content.
+    Get TTS cache counters.
 
     Returns:
-    - tuple: (list, int)
-        - List of detected filler words.
-        - Total count of filler words.
+    - dict: {"hits": int, "misses": int, "evictions": int, "coalesced": int}
+        "coalesced" counts requests that shared an identical synthesis in progress.
     """
-    filler_patterns = re.compile(r'\b(um|uh|like|you know|so|well|actually|basically|literally|right|okay)\b', re.IGNORECASE)
-    fillers = filler_patterns.findall(transcribed_text)
-    
-    filler_count = len(fillers)
-    return fillers, filler_count
+    with _TTS_CACHE_LOCK:
+        return dict(_TTS_CACHE_STATS)
+
+
+# Set on TTS pool workers, which must never wait for another job of their own pool
+_TTS_WORKER = threading.local()
+
+
+def _mark_tts_worker():
+    """Thread pool initializer: this thread is a TTS pool worker."""
+    _TTS_WORKER.active = True
+
 
+def get_tts_pool():
+    """Get the shared, bounded thread pool that runs every synthesis."""
+    return get_resource("tts_pool", lambda: concurrent.futures.ThreadPoolExecutor(
+        max_workers=TTS_MAX_WORKERS, thread_name_prefix="talkiee-tts", initializer=_mark_tts_worker
+    ))
 
-def analyze_uploaded_audio(file_path, status_callback=None,chunk_duration=30):
+
+def text_to_speech_async(response, lang="en", engine=None):
     """
-    Analyze pitch, pace, and transcribe the uploaded audio file.
-    
+    Start converting text to speech on the shared TTS pool.
+
+    Cache hits are resolved immediately without using a worker, and a
+    request for text that is already being synthesized gets that
+    synthesis's future instead of starting another one. Called from a
+    TTS pool worker, it synthesizes inline instead of queueing behind
+    itself, which could deadlock a saturated pool.
+
     Args:
-    - file_path (str): Path to the uploaded audio file.
-    - status_callback (function, optional): Callback function to update status messages during processing.
+    - response (str): The text to be converted into speech.
+    - lang (str): Language code for the speech.
+    - engine (str, optional): Backend name; defaults to `TTS_ENGINE`.
 
     Returns:
-    - tuple: (str, float, float)
-        - Transcribed text from the audio.
-        - Average pitch in Hz.
-        - Speaking pace in words per second.
-
-    Exceptions:
-    - FileNotFoundError: Raised if the file path is invalid.
-    - sr.UnknownValueError: Raised if speech recognition fails to understand the audio.
-    - sr.RequestError: Raised if speech recognition service is unavailable.
-    - Exception: Catches unexpected errors.
+    - concurrent.futures.Future: Resolves to the audio file path, or None on failure.
     """
-    if status_callback:
-        status_callback("Starting transcription...")
-    
-    # Transcribe the audio
-    recognizer = sr.Recognizer()
-    full_transcription = ""
+    backend = get_tts_backend(engine)
+    audio_path = os.path.normpath(_tts_cache_path(response, lang, backend))
+
+    with _TTS_CACHE_LOCK:
+        if os.path.exists(audio_path):
+            # Touch the file so eviction treats it as recently used
+            os.utime(audio_path)
+            _TTS_CACHE_STATS["hits"] += 1
+            future = concurrent.futures.Future()
+            future.set_result(audio_path)
+            return future
+        on_worker = getattr(_TTS_WORKER, "active", False)
+        future = _TTS_IN_FLIGHT.get(audio_path)
+        # A worker may only wait for a synthesis that is already running
+        if future is not None and (not on_worker or future.running()):
+            _TTS_CACHE_STATS["coalesced"] += 1
+            return future
+        _TTS_CACHE_STATS["misses"] += 1
+        if not on_worker:
+            future = _submit_counted(get_tts_pool(), _synthesize_to_cache, backend, response, lang, audio_path)
+            _TTS_IN_FLIGHT[audio_path] = future
+
+    _count_call("tts")
+    if on_worker:
+        future = concurrent.futures.Future()
+        future.set_result(_synthesize_to_cache(backend, response, lang, audio_path))
+        return future
+    future.add_done_callback(functools.partial(_forget_tts_flight, audio_path))
+    return future
+
+
+def _forget_tts_flight(audio_path, future):
+    """Done callback: later requests read the cache file instead."""
+    with _TTS_CACHE_LOCK:
+        if _TTS_IN_FLIGHT.get(audio_path) is future:
+            del _TTS_IN_FLIGHT[audio_path]
+
+
+def text_to_speech(response, lang="en", engine=None):
+    """
+    Convert feedback text to speech, reusing a cached file when available.
 
-    with sr.AudioFile(file_path) as source:
-        audio_length = int(librosa.get_duration(path=file_path))
-        for offset in range(0, audio_length, chunk_duration):
-            try:
-                audio = recognizer.record(source, duration=chunk_duration)
-                spoken_text = recognizer.recognize_google(audio, language="en-US")
-                
-                full_transcription += spoken_text + " "
-                
-            except sr.UnknownValueError:
-                full_transcription += "[Unclear Audio] "
-            except sr.RequestError as e:
-                full_transcription += f"[Error: {e}] "
+    The returned file is owned by the cache and must not be deleted by the caller.
 
-            if status_callback:
-                status_callback(f"Processed {min(offset + chunk_duration, audio_length)} of {audio_length} seconds")
-    
-    if status_callback:
-        status_callback("Analyzing audio characteristics...")
+    Args:
+    - response (str): The text to be converted into speech.
+    - lang (str): Language code for the speech.
+    - engine (str, optional): Backend name; defaults to `TTS_ENGINE`.
 
-    # Analyze pitch and pace
-    pitch, pace = analyze_audio(file_path)
+    Returns:
+    - str: The file path of the generated speech audio.
+    """
+    return text_to_speech_async(response, lang, engine).result()
 
-    return full_transcription.strip(), pitch, pace
 
+def _synthesize_to_cache(backend, text, lang, audio_path):
+    """Run `backend` on a pool worker and store its output in the cache."""
+    try:
+        return _store_tts_file(audio_path, functools.partial(backend.synthesize, text, lang))
+    except Exception as e:
+        print(f"TTS Failed: {e}")
+        return None
 
-# -------------------------
-# 3. DOCUMENT PROCESSING
-# -------------------------
 
-@functools.lru_cache(maxsize=100)
-def extract_text_from_file(uploaded_file, file_extension):
+def _store_tts_file(audio_path, write):
     """
-    Extract text from PDF or DOCX file.
+    Atomically create a cache file and enforce the cache size cap.
 
     Args:
-    - uploaded_file (File object): The uploaded PDF or DOCX file.
-    - file_extension (str): The file extension ('pdf' or 'docx').
+    - audio_path (str): Destination path inside the cache directory.
+    - write (callable): Called with a scratch file path to write the audio to.
 
     Returns:
-    - str: Extracted text from the file.
-
-    Exceptions:
-    - ValueError: Raised if the file extension is not supported.
-    - Exception: Catches unexpected errors.
+    - str: `audio_path`.
     """
+    os.makedirs(TTS_CACHE_DIR, exist_ok=True)
+    # Write to a scratch file and rename so readers never see partial audio
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".part", dir=TTS_CACHE_DIR) as temp_file:
+        temp_path = temp_file.name
     try:
-        text = ""
+        write(temp_path)
+        os.replace(temp_path, audio_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
 
-        if file_extension == "pdf":
-            reader = PyPDF2.PdfReader(uploaded_file)
-            for page in reader.pages:
-                text += page.extract_text() or ""
+    with _TTS_CACHE_LOCK:
+        _evict_tts_cache()
+    return audio_path
 
-        elif file_extension == "docx":
-            doc = docx.Document(uploaded_file)
-            for para in doc.paragraphs:
-                text += para.text + "\n"
 
-        else:
-            raise ValueError("Unsupported file format. Only PDF and DOCX are supported.")
+# A sentence ends at ., ! or ? followed by whitespace, or at a line break
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n+")
 
-        return text
 
-    except ValueError as ve:
-        print(f"ValueError: {ve}")
-        return 
+class SpeechPipeline:
+    """
+    Speak a streamed response sentence by sentence.
+
+    Feed it text deltas as they are generated (an instance can be passed
+    directly as an `on_token` callback). Every complete sentence is
+    synthesized on the shared TTS pool while the rest of the response is
+    still being generated, and `on_audio` is called on the feeding thread
+    with each sentence's audio file, in order, as soon as it is ready.
+
+    Args:
+    - on_audio (callable, optional): Called with the path of each sentence's audio.
+    - lang (str): Language code for the speech.
+    - engine (str, optional): Backend name; defaults to `TTS_ENGINE`.
+    - min_chars (int): Shorter fragments (list markers, headings) are merged
+      into the following sentence.
+    """
+
+    def __init__(self, on_audio=None, lang="en", engine=None, min_chars=12):
+        self.on_audio = on_audio
+        self.lang = lang
+        self.engine = engine
+        self.min_chars = min_chars
+        self.text = ""
+        self.segments = []
+        self.first_audio_at = None
+        self._buffer = ""
+        self._pending = collections.deque()
+        self._failed = False
+        self._started = time.perf_counter()
+
+    def __call__(self, delta):
+        self.feed(delta)
+
+    def feed(self, delta):
+        """Add a text delta and submit any sentences it completes."""
+        self.text += delta
+        self._buffer += delta
+        start = 0
+        for match in _SENTENCE_END.finditer(self._buffer):
+            if match.start() - start >= self.min_chars:
+                self._submit(self._buffer[start:match.start()])
+                start = match.end()
+        self._buffer = self._buffer[start:]
+        self._deliver(wait=False)
+
+    def close(self):
+        """
+        Flush the last sentence and wait for all audio.
+
+        Returns:
+        - str or None: Path of the whole response's audio (the sentence files
+          joined in order and cached under the full text), or None if a
+          sentence could not be synthesized.
+        """
+        self._submit(self._buffer)
+        self._buffer = ""
+        self._deliver(wait=True)
+        if self._failed or not self.segments:
+            return None
+        return self._join()
+
+    def _submit(self, sentence):
+        sentence = sentence.strip()
+        if sentence:
+            self._pending.append((sentence, text_to_speech_async(sentence, self.lang, self.engine)))
+
+    def _deliver(self, wait):
+        while self._pending and (wait or self._pending[0][1].done()):
+            sentence, future = self._pending.popleft()
+            audio_path = future.result()
+            if audio_path is None:
+                # Retry just this sentence, in place, so playback stays in order
+                audio_path = text_to_speech(sentence, self.lang, self.engine)
+            if audio_path is None:
+                self._failed = True
+                continue
+            if self.first_audio_at is None:
+                self.first_audio_at = time.perf_counter() - self._started
+            self.segments.append(audio_path)
+            if self.on_audio:
+                self.on_audio(audio_path)
+
+    def _join(self):
+        if len(self.segments) == 1:
+            return self.segments[0]
+        backend = get_tts_backend(self.engine)
+        audio_path = os.path.normpath(_tts_cache_path(self.text, self.lang, backend))
+        if os.path.exists(audio_path):
+            return audio_path
+
+        def write(path):
+            if backend.suffix == ".mp3":
+                # MP3 is a sequence of self-contained frames, so the sentence
+                # files can be joined byte for byte (gTTS does the same for long texts)
+                with open(path, "wb") as out:
+                    for segment in self.segments:
+                        with open(segment, "rb") as f:
+                            out.write(f.read())
+                return
+            info = sf.info(self.segments[0])
+            with sf.SoundFile(path, "w", samplerate=info.samplerate, channels=info.channels,
+                              format="WAV") as out:
+                for segment in self.segments:
+                    out.write(sf.read(segment, dtype="float32")[0])
+
+        try:
+            return _store_tts_file(audio_path, write)
+        except (OSError, RuntimeError) as e:
+            print(f"TTS Failed: {e}")
+            return None
 
-    except Exception as e:
-        print(f"Unexpected error: {e}")
-        return 
 
-    
 # -------------------------
-# 4. AUDIO OUTPUT
+# 5. FEEDBACK GENERATION
 # -------------------------
 
+# Tokens of conversation history sent with each chat turn
+CONTEXT_TOKEN_BUDGET = int(os.getenv("TALKIEE_CONTEXT_TOKENS", 1500))
+
 
-def text_to_speech(response):
+def count_tokens(text):
     """
-    Convert feedback text to speech and save it as an audio file.
+    Estimate the number of tokens in `text` (about 4 characters per token in English).
 
     Args:
-    - response (str): The text to be converted into speech.
+    - text (str): The text.
 
     Returns:
-    - str: The file path of the generated speech audio.
+    - int: Estimated token count.
     """
-    try:
-        tts = gTTS(text=response, lang='en')
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".mp3")
-        tts.save(temp_file.name)
-        audio_path = os.path.normpath(temp_file.name)
-        return audio_path
+    return (len(text) + 3) // 4
 
-    except Exception as e:
-        print(f"TTS Failed")
-        return None
 
+class ChatContext:
+    """
+    Token-budgeted view of a conversation for the chat prompt.
+
+    The most recent messages are kept verbatim while they fit the budget.
+    Older messages are folded into a running summary by a background LLM
+    call once `fold_batch` of them have accumulated, so the prompt stays
+    bounded however long the conversation gets and no turn waits for the
+    summary. Messages that have left the window but are not folded yet are
+    left out until the next fold completes.
 
-# -------------------------
-# 5. FEEDBACK GENERATION
-# -------------------------
+    Keep one instance per conversation (e.g. in the Streamlit session).
+
+    Args:
+    - token_budget (int): Tokens available for summary plus recent messages.
+    - fold_batch (int): Older messages to collect before updating the summary.
+    - summarize (bool): If False, older messages are simply dropped.
+    """
+
+    def __init__(self, token_budget=CONTEXT_TOKEN_BUDGET, fold_batch=4, summarize=True):
+        self.token_budget = token_budget
+        self.fold_batch = fold_batch
+        self.summarize = summarize
+        self.summary = ""
+        self.summarized = 0
+        self.prompt_tokens = []
+        self._folding = False
+        self._lock = threading.Lock()
+
+    def render(self, chat_history):
+        """
+        Build the history section of the prompt.
+
+        Args:
+        - chat_history (list): All messages of the conversation, oldest first.
+
+        Returns:
+        - str: The summary (if any) followed by the recent messages.
+        """
+        with self._lock:
+            if self.summarized > len(chat_history):
+                # The history was cleared; start over
+                self.summary, self.summarized = "", 0
+            summary, summarized = self.summary, self.summarized
+
+        budget = self.token_budget - count_tokens(summary)
+        recent = []
+        used = 0
+        for message in reversed(chat_history[summarized:]):
+            cost = count_tokens(message) + 1
+            if used + cost > budget:
+                break
+            recent.append(message)
+            used += cost
+        window_start = len(chat_history) - len(recent)
+
+        if self.summarize and window_start - summarized >= self.fold_batch:
+            self._schedule_fold(list(chat_history[summarized:window_start]), window_start)
+
+        lines = [f"Summary of the earlier conversation: {summary}"] if summary else []
+        lines.extend(reversed(recent))
+        return "\n".join(lines)
+
+    def _schedule_fold(self, messages, upto):
+        with self._lock:
+            if self._folding:
+                return
+            self._folding = True
+        _submit_background(get_prefetch_pool(), self._fold, messages, upto)
+
+    def _fold(self, messages, upto):
+        """Fold `messages` into the summary (runs on the prefetch pool)."""
+        try:
+            prompt = (
+                "Update the running summary of a conversation between a user and a communication coach. "
+                "Keep the user's goals, recurring mistakes and the advice already given. "
+                "Reply with the updated summary only, under 150 words.\n\n"
+                f"Current summary: {self.summary or '(none)'}\n\n"
+                "New messages:\n" + "\n".join(messages)
+            )
+            summary = ask_grok(prompt, use_cache=False)
+            if summary and not summary.startswith(_LLM_ERROR_PREFIXES):
+                with self._lock:
+                    self.summary, self.summarized = summary.strip(), upto
+        except Exception as e:
+            print(f"Summary update failed: {e}")
+        finally:
+            with self._lock:
+                self._folding = False
 
-def get_text_feedback(text, chat_history):
+
+def get_text_feedback(text, chat_history, on_token=None, context=None):
     """
     Send text to Grok and get general communication feedback.
 
     Args:
     - text (str): The input text to analyze.
     - chat_history (list): The conversation history for context.
+    - on_token (callable, optional): Stream the response, calling `on_token(delta)` for each delta.
+    - context (ChatContext, optional): Keeps the history within the token budget,
+      summarizing older turns. Without it, only the recent turns that fit are sent.
 
     Returns:
     - str: Feedback on tone, clarity, grammar, and delivery.
@@ -359,7 +2755,8 @@ def get_text_feedback(text, chat_history):
     if not text:
         return "No valid input detected."
 
-    history = "\n".join(chat_history)
+    context = context or ChatContext(summarize=False)
+    history = context.render(chat_history)
     prompt = (
         f"You are a professional communication improvement coach. Your role is to assist users "
         f"in enhancing their verbal and written communication skills. Provide feedback on tone, clarity, grammar, "
@@ -367,8 +2764,9 @@ def get_text_feedback(text, chat_history):
         f"Conversation History:\n{history}\n"
         f"User: {text}\nAssistant:"
     )
+    context.prompt_tokens.append(count_tokens(prompt))
 
-    response = asyncio.run(call_grok(prompt))
+    response = ask_grok(prompt, on_token=on_token)
 
     if response:
         # Append to chat history
@@ -379,7 +2777,7 @@ def get_text_feedback(text, chat_history):
     else:
         return "Failed to get a response from Talkiee."
     
-def get_voice_feedback(text, pitch, pace, chat_history):
+def get_voice_feedback(text, pitch, pace, chat_history, on_token=None):
     """
     Send text and audio metrics to Grok and get vocal delivery feedback.
 
@@ -388,6 +2786,7 @@ def get_voice_feedback(text, pitch, pace, chat_history):
     - pitch (float): The average pitch of the speech in Hz.
     - pace (float): The speaking pace in words per second.
     - chat_history (list): List of conversation history.
+    - on_token (callable, optional): Stream the response, calling `on_token(delta)` for each delta.
 
     Returns:
     - str: Feedback on vocal delivery, including strengths, improvement areas, and tips.
@@ -410,14 +2809,14 @@ def get_voice_feedback(text, pitch, pace, chat_history):
         "Tone: Encouraging, direct, constructive."
     )
 
-    response = asyncio.run(call_grok(prompt))
+    response = ask_grok(prompt, on_token=on_token)
 
     chat_history.append(f"User: {text}")
     chat_history.append(f"Assistant: {response}")
 
     return response
 
-def get_interview_feedback(text, pitch, pace, chat_history):
+def get_interview_feedback(text, pitch, pace, chat_history, on_token=None):
     """
     Send interview response and audio metrics to Grok for HR interview feedback.
 
@@ -426,6 +2825,7 @@ def get_interview_feedback(text, pitch, pace, chat_history):
     - pitch (float): The average pitch of the response in Hz (indicates tone quality).
     - pace (float): The speaking pace in words per second.
     - chat_history (list): List storing the conversation history.
+    - on_token (callable, optional): Stream the response, calling `on_token(delta)` for each delta.
 
     Returns:
     - str: Detailed HR interview feedback, including strengths, improvement areas, and tips.
@@ -449,7 +2849,7 @@ def get_interview_feedback(text, pitch, pace, chat_history):
         f"4. Interview Readiness: Overall potential"
     )
 
-    response = asyncio.run(call_grok(prompt))
+    response = ask_grok(prompt, on_token=on_token)
 
     # Store exchange in chat history
     chat_history.append(f"User: {text}")
@@ -457,7 +2857,7 @@ def get_interview_feedback(text, pitch, pace, chat_history):
 
     return response
 
-def get_storytelling_feedback(text, pitch, pace, chat_history):
+def get_storytelling_feedback(text, pitch, pace, chat_history, on_token=None):
     """
     Send story narration and audio metrics to Grok for storytelling feedback.
 
@@ -466,6 +2866,7 @@ def get_storytelling_feedback(text, pitch, pace, chat_history):
     - pitch (float): The average pitch of the audio in Hz (indicates tone quality).
     - pace (float): The speaking pace in words per second.
     - chat_history (list): List storing the conversation history.
+    - on_token (callable, optional): Stream the response, calling `on_token(delta)` for each delta.
 
     Returns:
     - str: Detailed storytelling feedback, including picturization, narrative flow, emotional impact, and language critique.
@@ -488,44 +2889,255 @@ def get_storytelling_feedback(text, pitch, pace, chat_history):
         "Provide brief, constructive feedback on storytelling performance."
     )
 
-    response = asyncio.run(call_grok(prompt))
+    response = ask_grok(prompt, on_token=on_token)
 
     chat_history.append(f"User Story: {text}")
     chat_history.append(f"LLM Feedback: {response}")
 
     return response
 
-def get_presentation_feedback(text, pitch, pace):
+# Presentations longer than PRESENTATION_SECTION_TOKENS are reviewed section by
+# section (map), then the section notes are merged into one report (reduce)
+PRESENTATION_SECTION_TOKENS = int(os.getenv("TALKIEE_SECTION_TOKENS", 8000))
+PRESENTATION_MAX_CONCURRENCY = int(os.getenv("TALKIEE_SECTION_CONCURRENCY", 8))
+
+
+def split_into_sections(text, max_tokens=None):
+    """
+    Split text into consecutive sections of at most `max_tokens` tokens.
+
+    Sections break at paragraph boundaries where possible, then at sentence
+    ends, and only cut through a sentence longer than a whole section.
+
+    Args:
+    - text (str): The text to split.
+    - max_tokens (int, optional): Section size; defaults to `PRESENTATION_SECTION_TOKENS`.
+
+    Returns:
+    - list: Section strings, in order.
+    """
+    return list(iter_sections([text], max_tokens))
+
+
+def iter_sections(chunks, max_tokens=None):
+    """
+    Split text arriving in chunks (e.g. document pages) into sections.
+
+    Same sections as `split_into_sections` on the joined text, but each is
+    yielded as soon as it is complete, so work on the first sections can
+    start while later pages are still being extracted.
+
+    Args:
+    - chunks (iterable): Consecutive pieces of the text.
+    - max_tokens (int, optional): Section size; defaults to `PRESENTATION_SECTION_TOKENS`.
+
+    Yields:
+    - str: The next section.
+    """
+    max_chars = (max_tokens or PRESENTATION_SECTION_TOKENS) * 4
+    current, size = [], 0
+    tail = ""
+    for chunk in itertools.chain(chunks, [None]):
+        if chunk is None:
+            paragraphs, tail = [tail], ""
+        else:
+            # The last paragraph may continue in the next chunk
+            paragraphs = re.split(r"\n\s*\n", tail + chunk)
+            tail = paragraphs.pop()
+            if len(tail) > max_chars:
+                # Release its complete sentences and whole-section cuts early
+                sentences = re.split(r"(?<=[.!?])\s+", tail)
+                tail = sentences.pop()
+                cut = len(tail) - len(tail) % max_chars
+                paragraphs += sentences + [tail[i:i + max_chars] for i in range(0, cut, max_chars)]
+                tail = tail[cut:]
+
+        for paragraph in paragraphs:
+            if len(paragraph) <= max_chars:
+                pieces = [paragraph]
+            else:
+                pieces = [
+                    sentence[i:i + max_chars]
+                    for sentence in re.split(r"(?<=[.!?])\s+", paragraph)
+                    for i in range(0, len(sentence), max_chars)
+                ]
+            for piece in pieces:
+                if not piece.strip():
+                    continue
+                if current and size + len(piece) + 2 > max_chars:
+                    yield "\n\n".join(current)
+                    current, size = [], 0
+                current.append(piece)
+                size += len(piece) + 2
+    if current:
+        yield "\n\n".join(current)
+
+
+def get_presentation_feedback(text, pitch, pace, on_token=None, use_cache=True,
+                              section_tokens=None, max_concurrency=None, status_callback=None):
     """
     Analyze presentation delivery and provide feedback with Grok.
 
+    Presentations longer than `section_tokens` are reviewed in map-reduce
+    mode: each section is reviewed concurrently, then the notes are merged
+    into one report. Given a page stream, sections are reviewed while the
+    later pages are still being extracted.
+
     Args:
-    - text (str): The transcribed content of the user's presentation.
+    - text (str or iterable): The transcribed content of the user's presentation,
+      or its pages in order (e.g. from `stream_text_from_file`).
     - pitch (float): The average pitch of the audio in Hz (tone quality).
     - pace (float): The speaking pace in words per second.
+    - on_token (callable, optional): Stream the response, calling `on_token(delta)` for each delta.
+    - use_cache (bool): Reuse the cached feedback for an identical resubmission.
+    - section_tokens (int, optional): Largest text sent in one prompt; defaults to `PRESENTATION_SECTION_TOKENS`.
+    - max_concurrency (int, optional): Section reviews in flight at once; defaults to `PRESENTATION_MAX_CONCURRENCY`.
+    - status_callback (function, optional): Callback function to update status messages during a map-reduce review.
 
     Returns:
     - str: Detailed feedback on the presentation covering clarity, structure, delivery, and professionalism.
 
     """
-    if not text:
+    section_tokens = section_tokens or PRESENTATION_SECTION_TOKENS
+    max_concurrency = max_concurrency or PRESENTATION_MAX_CONCURRENCY
+    if not isinstance(text, str):
+        # Read pages until the text is known to need more than one prompt
+        pages = iter(text)
+        head, tokens = [], 0
+        for page in pages:
+            head.append(page)
+            tokens += count_tokens(page)
+            if tokens > section_tokens:
+                break
+        after = next(pages, None) if tokens > section_tokens else None
+        if after is not None:
+            return _map_reduce_presentation_feedback(
+                itertools.chain(head, [after], pages), pitch, pace, on_token, use_cache,
+                section_tokens, max_concurrency, status_callback,
+            )
+        text = "".join(head)
+
+    if not text.strip():
+        # e.g. a scanned PDF with no text layer
+        if on_token is not None:
+            on_token("No valid input detected.")
         return "No valid input detected."
 
-    fillers, filler_count = detect_filler_words(text)
+    if count_tokens(text) > section_tokens:
+        return _map_reduce_presentation_feedback(
+            text, pitch, pace, on_token, use_cache, section_tokens, max_concurrency, status_callback,
+        )
+
+    user_presentation = f"📊 **User's Presentation Content:**\n{text}"
+
+    prompt = (
+       f"🔎 **Audio Metrics:**\n{_presentation_metrics(text, pitch, pace)}\n\n"
+        f"{user_presentation}\n\n"
+        f"💡 Evaluate the presentation focusing on:\n"
+        f"- Clarity & structure\n"
+        f"- Content relevance\n"
+        f"- Delivery & tone\n"
+        f"- Pace & timing\n"
+        f"- Language & vocabulary\n"
+        f"- Overall presentation skills\n"
+        f"📌 Provide actionable feedback with specific improvement suggestions."
+    )
+
+    response = ask_grok(prompt, on_token=on_token, use_cache=use_cache)
+    return response
 
 
-    audio_metrics = (
+def _presentation_metrics(text, pitch, pace):
+    """Format the audio metrics block of the presentation prompts."""
+    fillers, filler_count = detect_filler_words(text)
+    return (
         f"- **Pitch:** {pitch:.2f} Hz (tone quality)\n"
         f"- **Pace:** {pace:.2f} words/sec (speaking speed)\n"
         f"- **Filler words:** {', '.join(fillers)} (Total: {filler_count})"
     )
 
-    user_presentation = f"📊 **User's Presentation Content:**\n{text}"
 
+def _map_reduce_presentation_feedback(text, pitch, pace, on_token, use_cache, section_tokens,
+                                      max_concurrency, status_callback):
+    """
+    Review each section concurrently, then merge the notes into one report.
+
+    `text` is the whole presentation, or an iterable of its pages whose
+    sections are submitted for review as soon as they are complete.
+
+    Section notes are sampled and never cached. With `use_cache`, the final
+    report is cached under the presentation itself, since its own prompt
+    (built from the notes) differs between runs. A page stream can't be
+    looked up before it has been read, but its report is still stored.
+    """
+    def report_key(text):
+        metrics = _presentation_metrics(text, pitch, pace)
+        return _llm_cache_key(f"map-reduce {section_tokens}\n{metrics}\n{text}")
+
+    use_cache = use_cache and LLM_CACHE_TTL > 0
+    if isinstance(text, str):
+        if use_cache:
+            cached = _llm_cache_get(report_key(text))
+            if cached is not None:
+                if on_token is not None:
+                    on_token(cached[0])
+                return cached[0]
+        pages = [text]
+    else:
+        pages = text
+
+    start = time.perf_counter()
+    received = []
+
+    def read():
+        for page in pages:
+            received.append(page)
+            yield page
+
+    def review_section(index, section):
+        prompt = (
+            f"📊 **Section {index + 1} of the user's presentation:**\n{section}\n\n"
+            f"💡 Note the strengths and weaknesses of this section in clarity & structure, "
+            f"content relevance, and language & vocabulary. Quote specific phrases. "
+            f"Keep the notes brief; they will be merged with notes on the other sections."
+        )
+        # Partial notes are never cached; only the final report is
+        return ask_grok(prompt, use_cache=False)
+
+    notes = []
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=max_concurrency, thread_name_prefix="talkiee-sections"
+    ) as pool:
+        futures = []
+        for index, section in enumerate(iter_sections(read(), section_tokens)):
+            futures.append(_submit_counted(pool, review_section, index, section))
+            if status_callback:
+                status_callback(f"Reviewing section {index + 1}...")
+        total = len(futures)
+        for done, future in enumerate(futures, 1):
+            notes.append(f"**Section {done}:**\n{future.result()}")
+            if status_callback:
+                status_callback(f"Reviewed {done} of {total} sections")
+
+        # Condense the notes until they fit in one prompt
+        merged = "\n\n".join(notes)
+        while count_tokens(merged) > section_tokens:
+            groups = split_into_sections(merged, section_tokens)
+            if len(groups) >= len(notes):
+                break
+            notes = list(_map_counted(pool, lambda group: ask_grok(
+                f"Condense these presentation review notes, keeping every concrete point:\n\n{group}",
+                use_cache=False,
+            ), groups))
+            merged = "\n\n".join(notes)
+
+    if status_callback:
+        status_callback("Writing the final report...")
+    text = "".join(received)
     prompt = (
-       f"🔎 **Audio Metrics:**\n{audio_metrics}\n\n"
-        f"{user_presentation}\n\n"
-        f"💡 Evaluate the presentation focusing on:\n"
+        f"🔎 **Audio Metrics:**\n{_presentation_metrics(text, pitch, pace)}\n\n"
+        f"📊 **Reviewer notes on the {total} sections of the user's presentation:**\n{merged}\n\n"
+        f"💡 Merge these notes into one evaluation of the whole presentation, focusing on:\n"
         f"- Clarity & structure\n"
         f"- Content relevance\n"
         f"- Delivery & tone\n"
@@ -534,15 +3146,40 @@ def get_presentation_feedback(text, pitch, pace):
         f"- Overall presentation skills\n"
         f"📌 Provide actionable feedback with specific improvement suggestions."
     )
-
-    response = asyncio.run(call_grok(prompt))
+    priority = getattr(_THREAD_PRIORITY, "value", PRIORITY_INTERACTIVE)
+    response, complete = _fetch_grok(prompt, on_token, priority)
+    if use_cache and complete:
+        _llm_cache_put(report_key(text), response, time.perf_counter() - start)
     return response
 
 # -------------------------
 # 6. CONTENT GENERATION
 # -------------------------
 
-def get_hr_question():
+HR_QUESTION_TOPICS = [
+    "behavioral", 
+    "situational", 
+    "cultural fit", 
+    "strengths and weaknesses", 
+    "conflict resolution", 
+    "communication skills", 
+    "team collaboration"
+]
+
+PASSAGE_SUBJECTS = [
+    "communication, collaboration, and empathy",
+    "leadership, decision-making, and conflict resolution",
+    "time management, productivity, and goal setting",
+    "adaptability, resilience, and creativity",
+    "problem-solving, critical thinking, and innovation",
+    "teamwork, collaboration, and motivation",
+    "personal growth, discipline, and self-awareness",
+    "influence, negotiation, and persuasion",
+    "public speaking, confidence, and presence"
+]
+
+
+def get_hr_question(topic=None):
     """
     Get a unique HR interview question from Grok.
 
@@ -551,22 +3188,12 @@ def get_hr_question():
     - It sends a dynamic and varied prompt to Grok to ensure unique questions each time.
     
     Args:
-    - None
+    - topic (str, optional): One of `HR_QUESTION_TOPICS`; random if omitted.
 
     Returns:
     - str: A unique HR interview question.
     """
-    question_types = [
-        "behavioral", 
-        "situational", 
-        "cultural fit", 
-        "strengths and weaknesses", 
-        "conflict resolution", 
-        "communication skills", 
-        "team collaboration"
-    ]
-    
-    topic = random.choice(question_types)
+    topic = topic or random.choice(HR_QUESTION_TOPICS)
 
     hr_prompt = (
         f"You are an HR interview coach. Generate a realistic and unique {topic} HR interview question. "
@@ -574,14 +3201,15 @@ def get_hr_question():
         "Each time, the question should be distinct and creative."
     )
  
-    response = asyncio.run(call_grok(hr_prompt))
+    # Never cached: every call should produce a new question
+    response = ask_grok(hr_prompt, use_cache=False)
     
     if not response:
         response = f"Describe a time when you faced a challenge related to {topic} and how you handled it."
 
     return response
 
-def generate_passage():
+def generate_passage(subject=None):
     """
     Generate a short passage using LLM for summarization exercises.
 
@@ -592,25 +3220,12 @@ def generate_passage():
     - The content is concise, meaningful, and workplace-relevant.
 
     Args:
-    - None
+    - subject (str, optional): One of `PASSAGE_SUBJECTS`; random if omitted.
 
     Returns:
     - str: The generated passage or a fallback passage in case of API failure.
     """
-    subjects = [
-        "communication, collaboration, and empathy",
-        "leadership, decision-making, and conflict resolution",
-        "time management, productivity, and goal setting",
-        "adaptability, resilience, and creativity",
-        "problem-solving, critical thinking, and innovation",
-        "teamwork, collaboration, and motivation",
-        "personal growth, discipline, and self-awareness",
-        "influence, negotiation, and persuasion",
-        "public speaking, confidence, and presence"
-    ]
-
-   
-    random_subject = random.choice(subjects)
+    random_subject = subject or random.choice(PASSAGE_SUBJECTS)
     
     passage_prompt = (
         f"Generate three unique and insightful sentences about {random_subject}. "
@@ -619,7 +3234,7 @@ def generate_passage():
     )
     
     try:
-        response = asyncio.run(call_grok(passage_prompt))
+        response = ask_grok(passage_prompt, use_cache=False)
 
 
         if response:
@@ -647,7 +3262,7 @@ def generate_passage():
         print(f"Error generating passage: {e}")
         return f"Error generating passage: {str(e)}"
 
-def get_summary_feedback(passage, user_summary):
+def get_summary_feedback(passage, user_summary, on_token=None, use_cache=True):
     """
     Get feedback on the user's summary compared to the original passage.
 
@@ -659,6 +3274,8 @@ def get_summary_feedback(passage, user_summary):
     Args:
     - passage (str): The original passage to be summarized.
     - user_summary (str): The user's summarized version of the passage.
+    - on_token (callable, optional): Stream the response, calling `on_token(delta)` for each delta.
+    - use_cache (bool): Reuse the cached feedback for an identical resubmission.
 
     Returns:
     - str: Feedback on the summary if successful.
@@ -672,7 +3289,7 @@ def get_summary_feedback(passage, user_summary):
     )
     
     try:
-        feedback_response = asyncio.run(call_grok(feedback_prompt))
+        feedback_response = ask_grok(feedback_prompt, on_token=on_token, use_cache=use_cache)
 
         if feedback_response:
             return feedback_response
@@ -680,4 +3297,353 @@ def get_summary_feedback(passage, user_summary):
             return "Couldn't generate feedback. Please try again."
 
     except Exception as e:
-        return f"Error generating feedback"
\ No newline at end of file
+        return f"Error generating feedback"
+
+# Ready-made content kept per topic, refilled in the background
+PREFETCH_TARGET = int(os.getenv("TALKIEE_PREFETCH_TARGET", 2))
+PREFETCH_LOW_WATERMARK = int(os.getenv("TALKIEE_PREFETCH_LOW_WATERMARK", 1))
+# Fill the pools during server warm-up instead of on first use of their page
+PREFETCH_AT_START = os.getenv("TALKIEE_PREFETCH_AT_START", "0") == "1"
+
+
+class ContentPool:
+    """
+    Per-topic queues of generated content, prefetched in the background.
+
+    Each topic keeps up to `target` items whose speech is already in the
+    TTS cache. Nothing is generated until the first `take()`, which
+    schedules a fill of every topic. Taking an item that leaves a topic
+    below `low_watermark` schedules a refill on the shared prefetch pool, so callers normally
+    get an item without waiting for the LLM. Items that repeat something
+    queued or recently served are discarded.
+
+    Args:
+    - generate (callable): `generate(topic) -> str`, e.g. `get_hr_question`.
+    - topics (list): Topics to keep queues for.
+    - target (int): Items to keep ready per topic.
+    - low_watermark (int): Refill a topic when it has fewer items than this.
+    - recent (int): How many served items to remember for deduplication.
+    - max_attempts (int): Generations per missing item before giving up on a refill.
+    """
+
+    def __init__(self, generate, topics, target=PREFETCH_TARGET, low_watermark=PREFETCH_LOW_WATERMARK,
+                 recent=100, max_attempts=3):
+        self.generate = generate
+        self.topics = list(topics)
+        self.target = target
+        self.low_watermark = low_watermark
+        self.max_attempts = max_attempts
+        self._queues = {topic: collections.deque() for topic in self.topics}
+        self._refilling = set()
+        self._seen = set()
+        self._recent = collections.deque(maxlen=recent)
+        self._lock = threading.Lock()
+        self._used = False
+        self.stats = {"served": 0, "prefetched": 0, "waited": 0, "duplicates": 0}
+
+    @staticmethod
+    def _key(text):
+        return " ".join(text.lower().split())
+
+    def take(self, topic=None):
+        """
+        Get a ready item, generating one on the spot only if none is queued.
+
+        Args:
+        - topic (str, optional): Topic to take from; any ready topic if omitted.
+
+        Returns:
+        - str: The item text. Its speech is usually already cached.
+        """
+        with self._lock:
+            first_use, self._used = not self._used, True
+            if topic is None:
+                ready = [t for t in self.topics if self._queues[t]]
+                topic = random.choice(ready or self.topics)
+            queue_ = self._queues[topic]
+            text = queue_.popleft() if queue_ else None
+            if text is not None:
+                self.stats["served"] += 1
+            else:
+                self.stats["waited"] += 1
+
+        if text is None:
+            text = self.generate(topic)
+        self._mark_served(self._key(text))
+        # The first take fills every topic, so later picks have a choice
+        self.refill(None if first_use else topic)
+        return text
+
+    def _mark_served(self, key):
+        """Remember a served item; the oldest one becomes eligible again."""
+        with self._lock:
+            if len(self._recent) == self._recent.maxlen:
+                self._seen.discard(self._recent[0])
+            self._recent.append(key)
+            self._seen.add(key)
+
+    def refill(self, topic=None):
+        """Schedule background refills for `topic` (or every topic) below the watermark."""
+        with self._lock:
+            for name in [topic] if topic else self.topics:
+                if len(self._queues[name]) < self.low_watermark and name not in self._refilling:
+                    self._refilling.add(name)
+                    _submit_background(get_prefetch_pool(), self._fill, name)
+
+    def _fill(self, topic):
+        """Generate items for `topic` until it reaches the target (runs on the prefetch pool)."""
+        try:
+            attempts = 0
+            while attempts < self.max_attempts:
+                with self._lock:
+                    if len(self._queues[topic]) >= self.target:
+                        return
+                attempts += 1
+                text = self.generate(topic)
+                if not text or text.startswith(_LLM_ERROR_PREFIXES + ("Error",)):
+                    continue
+                key = self._key(text)
+                with self._lock:
+                    if key in self._seen:
+                        self.stats["duplicates"] += 1
+                        continue
+                    self._seen.add(key)
+                # Synthesize before queueing so the item is ready to play
+                text_to_speech(text)
+                with self._lock:
+                    self._queues[topic].append(text)
+                    self.stats["prefetched"] += 1
+                attempts = 0
+        except Exception as e:
+            print(f"Prefetch failed for '{topic}': {e}")
+        finally:
+            with self._lock:
+                self._refilling.discard(topic)
+
+    def size(self):
+        """Return the number of ready items per topic."""
+        with self._lock:
+            return {topic: len(queue_) for topic, queue_ in self._queues.items()}
+
+
+def get_prefetch_pool():
+    """Get the shared pool for background work; its LLM calls yield to interactive ones."""
+    return get_resource("prefetch_pool", lambda: concurrent.futures.ThreadPoolExecutor(
+        max_workers=2, thread_name_prefix="talkiee-prefetch", initializer=_run_as_background
+    ))
+
+
+def get_question_pool():
+    """Get the shared pool of prefetched HR interview questions."""
+    return get_resource("pool:questions", lambda: ContentPool(get_hr_question, HR_QUESTION_TOPICS))
+
+
+def get_passage_pool():
+    """Get the shared pool of prefetched listening passages."""
+    return get_resource("pool:passages", lambda: ContentPool(generate_passage, PASSAGE_SUBJECTS))
+
+
+def next_hr_question():
+    """
+    Get the next HR interview question from the prefetched pool.
+
+    Returns:
+    - str: A question whose speech is usually already cached.
+    """
+    return get_question_pool().take()
+
+
+def next_passage():
+    """
+    Get the next listening passage from the prefetched pool.
+
+    Returns:
+    - str: A passage whose speech is usually already cached.
+    """
+    return get_passage_pool().take()
+
+
+# -------------------------
+# 7. VOICE TURN PIPELINE
+# -------------------------
+
+def _timed_call(func, *args):
+    """Call `func(*args)` and return (result, elapsed seconds)."""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def run_voice_turn(get_feedback, chat_history, on_transcript=None, recognize=None, on_token=None,
+                   on_audio=None):
+    """
+    Record a spoken answer and produce feedback for it.
+
+    Leading and trailing silence is trimmed with the VAD before recognition.
+    Transcription and pitch/pace analysis only depend on the recording, so
+    they run concurrently; the LLM call starts as soon as both are done and
+    is followed by speech synthesis of the feedback. With `on_audio`, the
+    feedback is streamed through a `SpeechPipeline` so it starts being
+    spoken before the LLM has finished.
+
+    Args:
+    - get_feedback (callable): Feedback function with the signature
+      `(text, pitch, pace, chat_history, on_token=None) -> str`, e.g. `get_voice_feedback`.
+    - chat_history (list): Conversation history passed to `get_feedback`.
+    - on_transcript (callable, optional): Called with the transcript as soon
+      as it is available, before the feedback is generated.
+    - recognize (callable, optional): STT backend, `recognize(sr.AudioData) -> str`.
+      Defaults to `transcribe_audio`.
+    - on_token (callable, optional): Passed to `get_feedback` to stream the
+      feedback as it is generated.
+    - on_audio (callable, optional): Called with the audio file of each
+      feedback sentence, in order, as soon as it is synthesized.
+
+    Returns:
+    - dict:
+        - "spoken_text" (str): The transcript.
+        - "pitch" (float): Average pitch in Hz.
+        - "pace" (float): Pace in words per second.
+        - "feedback" (str): The LLM feedback.
+        - "feedback_audio" (str): Path of the synthesized feedback audio.
+        - "timings" (dict): Seconds spent in "record", "stt", "analysis",
+          "feedback", "tts" and "total"; with `on_audio` also "first_audio",
+          the time from the start of the LLM call to the first spoken sentence.
+        - "error" (str or None): User-facing message if recording or
+          transcription failed; the other fields are then unset.
+    """
+    recognize = recognize or transcribe_audio
+    timings = {}
+    turn = {
+        "spoken_text": None,
+        "pitch": 0.0,
+        "pace": 0.0,
+        "feedback": None,
+        "feedback_audio": None,
+        "timings": timings,
+        "error": None,
+    }
+    start = time.perf_counter()
+
+    try:
+        audio_data, timings["record"] = _timed_call(record_speech)
+    except Exception as e:
+        turn["error"] = speech_error_message(e)
+        return turn
+
+    decoded = DecodedAudio.from_file(io.BytesIO(audio_data.get_wav_data()))
+    segments = None
+    if VAD_ENABLED:
+        # Recognize only from the first to the last word; pace over speaking time
+        segments = detect_speech_segments(decoded)
+        if not segments:
+            turn["error"] = speech_error_message(sr.UnknownValueError())
+            return turn
+        audio_data = decoded.to_audio_data(segments[0][0], segments[-1][1])
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as pool:
+        stt = pool.submit(_timed_call, recognize, audio_data)
+        acoustic = pool.submit(
+            _timed_call, functools.partial(analyze_decoded_audio, segments=segments), decoded
+        )
+
+        try:
+            turn["spoken_text"], timings["stt"] = stt.result()
+        except Exception as e:
+            turn["error"] = speech_error_message(e)
+            return turn
+
+        if on_transcript:
+            on_transcript(turn["spoken_text"])
+
+        analysis, timings["analysis"] = acoustic.result()
+        turn["pitch"], turn["pace"] = analysis["pitch"], analysis["pace"]
+
+    speech = None
+    if on_audio is not None:
+        speech = SpeechPipeline(on_audio=on_audio)
+        show = on_token
+
+        def on_token(delta):
+            if show:
+                show(delta)
+            speech.feed(delta)
+
+    turn["feedback"], timings["feedback"] = _timed_call(
+        functools.partial(get_feedback, on_token=on_token),
+        turn["spoken_text"], turn["pitch"], turn["pace"], chat_history
+    )
+    if speech is None:
+        turn["feedback_audio"], timings["tts"] = _timed_call(text_to_speech, turn["feedback"])
+    else:
+        turn["feedback_audio"], timings["tts"] = _timed_call(speech.close)
+        if speech.first_audio_at is not None:
+            timings["first_audio"] = speech.first_audio_at
+    timings["total"] = time.perf_counter() - start
+
+    return turn
+
+
+# -------------------------
+# 8. WARM-UP
+# -------------------------
+
+def _warm_llm_connection():
+    """Open a pooled connection to the LLM API so the first request skips TCP/TLS setup."""
+    client = get_llm_client()
+
+    async def ping():
+        try:
+            await client.get("/models", timeout=5.0)
+        except httpx.HTTPError:
+            pass
+
+    run_async(ping())
+
+
+def _warm_audio_kernels():
+    """Run the pitch/pace engine once so librosa's lazy imports and numba kernels are ready."""
+    y = np.random.default_rng(0).standard_normal(16000).astype(np.float32) * 0.1
+    analyze_pitch_pace(y, 16000)
+    return True
+
+
+# Steps run by `warm_up()`, in order
+WARM_UP_STEPS = {
+    "llm_loop": get_llm_loop,
+    "llm_connection": _warm_llm_connection,
+    "stt": get_stt_backend,
+    "tts": get_tts_backend,
+    "tts_pool": get_tts_pool,
+    "recognizer": lambda: get_resource("recognizer", sr.Recognizer),
+    "audio_kernels": lambda: get_resource("audio_kernels", _warm_audio_kernels),
+}
+if PREFETCH_AT_START:
+    # Dozens of LLM and TTS calls, so opt-in; otherwise pools fill on first use.
+    # Only schedules the first fill; it completes in the background
+    WARM_UP_STEPS["content_pools"] = lambda: (get_question_pool().refill(), get_passage_pool().refill())
+
+
+def warm_up(steps=None):
+    """
+    Create the shared resources before the first request needs them.
+
+    Call once at server start (the app does this on a background thread).
+    A step that fails is reported and skipped; its resource is then
+    created on first use as usual.
+
+    Args:
+    - steps (list, optional): Keys of `WARM_UP_STEPS` to run; defaults to all.
+
+    Returns:
+    - dict: Step name to seconds taken.
+    """
+    timings = {}
+    for name in steps or WARM_UP_STEPS:
+        start = time.perf_counter()
+        try:
+            WARM_UP_STEPS[name]()
+        except Exception as e:
+            print(f"Warm-up step '{name}' failed: {e}")
+        timings[name] = time.perf_counter() - start
+    return timings